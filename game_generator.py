@@ -17,11 +17,34 @@ import math
 import hashlib
 import re
 import sys
+import gzip
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from io import BytesIO
-from flask import Flask, render_template_string, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from flask import Flask, Response, request, jsonify
 import requests
+from requests.adapters import HTTPAdapter
 import pygame
-from PIL import Image
+from PIL import Image, ImageChops
+
+try:
+    # Optional: faster JSON decoding straight from response bytes (pip install orjson).
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """json.loads that takes str or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 # Track quest variety across generations
 LAST_QUEST_TYPE = None
@@ -34,35 +57,83 @@ LAST_QUEST_TYPE = None
 class Config:
     OPENAI_API_KEY = ""
     # Defaults favor cost-effective generation.
-    # The UI can override these per-run (Quality dropdown).
+    # The UI can override these per-run (Quality dropdown) via RunConfig.
     TEXT_MODEL = "gpt-4o-mini"
     IMAGE_MODEL = "gpt-image-1"
+    # Smallest square size each image model accepts; sprites end up 128x128, so bigger only costs bytes.
+    IMAGE_SIZES = {"dall-e-2": "256x256", "dall-e-3": "1024x1024", "gpt-image-1": "1024x1024"}
     IMAGE_QUALITY = "medium"  # high | medium | low
     # How many quest item sprites to generate per level (others use a generic icon).
     ITEM_SPRITES_PER_LEVEL = 1
+    TERRAIN_STYLE = "smooth"  # smooth | classic
     # Cost-saving: make cure quests use a consistent princess patient sprite.
     # When enabled, cure quests will bias/force the NPC to be "Princess ..." so baked princess sprites can be reused.
     FORCE_CURE_PRINCESS = True
+    # Design all levels of a run with a single text call (falls back to per-level calls).
+    BATCH_LEVEL_DESIGN = True
     IMAGE_MAX_RETRIES = 4
     IMAGE_RETRY_BASE_DELAY = 1.5
+    TEXT_MAX_RETRIES = 3
+    # Cap for exponential backoff (and for a server-sent Retry-After).
+    RETRY_MAX_DELAY = 20.0
+    # (connect, read) seconds for API calls; a stalled connection becomes a retryable Timeout instead of a hang.
+    HTTP_TIMEOUT = (10, 180)
     DEBUG_SPRITES = True
+    # Dev iteration: replay the stored model design for a repeated prompt/goal plan instead of a new text call.
+    CACHE_DESIGNS = False
     TILE_SIZE = 72
     GAME_WIDTH = 1400
     GAME_HEIGHT = 900
     MAP_WIDTH = 16
     MAP_HEIGHT = 12
     PLAYER_SPEED = 4
-    API_DELAY = 1.2
+    # Image requests in flight at once, across all levels of a run (and --bake-core).
+    IMAGE_CONCURRENCY = 8
+    # Decoded sprites kept in memory on top of the generated_sprites/ disk cache (~64 KB each).
+    SPRITE_MEMO_SIZE = 256
+    # --bake-core writes 8-bit palette PNGs with this many colors (~5x smaller than RGBA).
+    BAKED_SPRITE_COLORS = 32
     ANIM_SPEED = 0.08
     IDLE_BOB = 0
     WALK_BOB = 0
 
 
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    """Generation settings for one run; passed down instead of mutating Config."""
+    image_quality: str = Config.IMAGE_QUALITY
+    text_model: str = Config.TEXT_MODEL
+    item_sprites_per_level: int = Config.ITEM_SPRITES_PER_LEVEL
+    terrain_style: str = Config.TERRAIN_STYLE
+
+    @classmethod
+    def from_request(cls, data: dict) -> "RunConfig":
+        """Build from the UI's quality / terrainStyle fields."""
+        q = str(data.get("quality") or "medium").lower().strip()
+        if q not in ["low", "medium", "high"]:
+            q = "medium"
+        terrain_style = str(data.get("terrainStyle") or "smooth").lower().strip()
+        return cls(
+            image_quality=q,
+            # Text model choice by quality tier
+            # - low/medium: cheaper model
+            # - high: higher quality, higher cost
+            text_model="gpt-4o-mini" if q in ["low", "medium"] else "gpt-4o",
+            # Item sprite generation budget by quality.
+            # - low: no per-quest item sprites (uses a generic icon)
+            # - medium: generate 1 item sprite per level
+            # - high: generate 2 item sprites per level
+            item_sprites_per_level=0 if q == "low" else (2 if q == "high" else 1),
+            terrain_style=terrain_style if terrain_style in ["smooth", "classic"] else "smooth",
+        )
+
+
 ALLOWED_GOALS = ["cure", "key_and_door", "lost_item", "repair_bridge"]
 ALLOWED_BIOMES = ["meadow", "forest", "town", "beach", "snow", "desert", "ruins", "castle"]
 ALLOWED_TIMES = ["day", "dawn", "sunset", "night"]
 
 BAKED_SPRITES_DIR = os.path.join("assets", "sprites")
+DESIGN_CACHE_DIR = os.path.join(".cache", "designs")
 BAKED_MANIFEST_PATH = os.path.join(BAKED_SPRITES_DIR, "manifest.json")
 
 
@@ -91,6 +162,28 @@ def _load_baked_sprite(key: str) -> Image.Image | None:
         return None
 
 
+def _save_baked_sprite(img: Image.Image, out_path: str) -> None:
+    """Write a baked sprite as a palette PNG; FASTOCTREE keeps the alpha channel in the palette."""
+    pal = img.convert("RGBA").quantize(colors=Config.BAKED_SPRITE_COLORS, method=Image.Quantize.FASTOCTREE)
+    pal.save(out_path, optimize=True, compress_level=9)
+
+
+def _sprite_phash(img: Image.Image) -> tuple[int, tuple]:
+    """
+    Perceptual key for a sprite: a 64-bit difference hash of its shape plus its coarse average color.
+    Near-identical renders share a key; recolors (e.g. the sick/healed pair) do not.
+    """
+    rgba = img.convert("RGBA")
+    flat = Image.alpha_composite(Image.new("RGBA", rgba.size, (0, 0, 0, 255)), rgba)
+    px = flat.convert("L").resize((9, 8), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+    r, g, b, a = rgba.resize((1, 1), Image.BOX).getpixel((0, 0))
+    return bits, (r >> 5, g >> 5, b >> 5, a >> 5)
+
+
 def _looks_like_princess(npc: dict) -> bool:
     name = str(npc.get("name", "")).lower()
     desc = str(npc.get("sprite_desc", "")).lower()
@@ -504,11 +597,13 @@ def extract_env_hints(prompt: str) -> dict:
 # ============================================================
 
 class Particle:
+    __slots__ = ("x", "y", "color", "vx", "vy", "life", "max_life", "size", "gravity")
+
     def __init__(self, x, y, color, vx=0, vy=0, life=30, size=4, gravity=0):
         self.x, self.y = x, y
         self.color = color
-        self.vx = vx + random.uniform(-1, 1)
-        self.vy = vy + random.uniform(-1, 1)
+        self.vx = vx
+        self.vy = vy
         self.life = life
         self.max_life = life
         self.size = size
@@ -522,8 +617,30 @@ class Particle:
         return self.life > 0
     
     def draw(self, screen):
+        screen.blit(*self.blit_item())
+
+    def blit_item(self):
+        """(circle sprite, top-left) for this frame, ready for a batched blit."""
         size = max(1, int(self.size * (self.life / self.max_life)))
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), size)
+        return _particle_sprite(self.color, size), (int(self.x) - size, int(self.y) - size)
+
+
+@lru_cache(maxsize=256)
+def _particle_sprite(color: tuple, radius: int) -> pygame.Surface:
+    """Pre-rendered particle circle; blitting it at (x - r, y - r) matches draw.circle at (x, y)."""
+    surf = pygame.Surface((radius * 2 + 2, radius * 2 + 2), pygame.SRCALPHA)
+    pygame.draw.circle(surf, color, (radius, radius), radius)
+    return surf
+
+
+@lru_cache(maxsize=16)
+def _rock_sprite(color: tuple) -> pygame.Surface:
+    """Pre-rendered rock with highlight and shadow; blit at (cx - 16, cy - 10)."""
+    surf = pygame.Surface((32, 24), pygame.SRCALPHA)
+    pygame.draw.ellipse(surf, color, (1, 0, 30, 20))
+    pygame.draw.ellipse(surf, (color[0] + 20, color[1] + 20, color[2] + 20), (6, 2, 15, 10))
+    pygame.draw.ellipse(surf, (0, 0, 0), (0, 16, 32, 8))
+    return surf
 
 
 class EffectsManager:
@@ -532,31 +649,58 @@ class EffectsManager:
         self.flash = 0
         self.flash_color = (255, 255, 255)
         self.allow_flash = allow_flash
+        self._flash_surf = None
+        self._flash_fill = None
     
     def update(self):
         self.particles = [p for p in self.particles if p.update()]
         if self.flash > 0:
             self.flash -= 1
+
+    def is_idle(self) -> bool:
+        return not self.particles and self.flash <= 0
     
     def draw(self, screen):
-        for p in self.particles:
-            p.draw(screen)
+        if self.particles:
+            # One C-side blit pass for all particles (fblits on pygame-ce, blits otherwise).
+            items = [p.blit_item() for p in self.particles]
+            if hasattr(screen, "fblits"):
+                screen.fblits(items)
+            else:
+                screen.blits(items, doreturn=False)
         if self.flash > 0:
-            s = pygame.Surface(screen.get_size())
-            s.fill(self.flash_color)
+            s = self._flash_surf
+            if s is None or s.get_size() != screen.get_size():
+                s = self._flash_surf = pygame.Surface(screen.get_size())
+                self._flash_fill = None
+            # Refill only when the colour changes; each frame of a burst just re-sets the alpha.
+            if self._flash_fill != self.flash_color:
+                s.fill(self.flash_color)
+                self._flash_fill = self.flash_color
             s.set_alpha(int(40 * (self.flash / 10)))
             screen.blit(s, (0, 0))
     
     def _emit(self, x, y, colors, count, speed_range, vy_offset, life_range, size_range, gravity, flash_dur=0, flash_color=None):
         """Spawn particles in a circle — shared by sparkle/pickup/complete/smoke."""
-        for _ in range(count):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(*speed_range)
-            self.particles.append(Particle(
-                x, y, random.choice(colors) if isinstance(colors, list) else colors,
-                math.cos(angle) * speed, math.sin(angle) * speed + vy_offset,
-                random.randint(*life_range), random.randint(*size_range), gravity
-            ))
+        # Draw every random value for the burst up front with bare random() calls (uniform/randint/choice
+        # each add a Python-level wrapper per particle), then build the particles in one pass.
+        rand = random.random
+        n = count
+        angles = [rand() * (2 * math.pi) for _ in range(n)]
+        s_lo, s_hi = speed_range
+        speeds = [s_lo + (s_hi - s_lo) * rand() for _ in range(n)]
+        palette = colors if isinstance(colors, list) else [colors]
+        picks = [palette[int(rand() * len(palette))] for _ in range(n)]
+        l_lo, l_span = life_range[0], life_range[1] - life_range[0] + 1
+        lives = [l_lo + int(rand() * l_span) for _ in range(n)]
+        z_lo, z_span = size_range[0], size_range[1] - size_range[0] + 1
+        sizes = [z_lo + int(rand() * z_span) for _ in range(n)]
+        jitter = [2 * rand() - 1 for _ in range(2 * n)]
+        self.particles.extend(
+            Particle(x, y, picks[i], math.cos(angles[i]) * speeds[i] + jitter[2 * i],
+                     math.sin(angles[i]) * speeds[i] + vy_offset + jitter[2 * i + 1], lives[i], sizes[i], gravity)
+            for i in range(n)
+        )
         if flash_dur and self.allow_flash:
             self.flash = flash_dur
             self.flash_color = flash_color
@@ -580,100 +724,161 @@ class EffectsManager:
 # OPENAI CLIENT
 # ============================================================
 
+@lru_cache(maxsize=64)
+def _http_session(key_hash: str) -> requests.Session:
+    """Keep-alive connection pool shared by every client (and run) using the same API key."""
+    session = requests.Session()
+    # Level designs run on several threads at once; keep a connection for each.
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+    return session
+
+
+# Sprite pools for concurrent levels share these slots, so the API sees at most IMAGE_CONCURRENCY images at once.
+_IMAGE_SLOTS = threading.BoundedSemaphore(Config.IMAGE_CONCURRENCY)
+
+# Sprite cache path -> decoded image (LRU), plus a lock per in-flight path so identical prompts
+# requested at the same time make a single API call. This is also how levels of a run share
+# their town and player sprites: the path ignores the per-level theme.
+_SPRITE_MEMO: "OrderedDict[str, Image.Image]" = OrderedDict()
+# Path -> [lock, holders + waiters]; an entry is dropped when its last user leaves.
+_SPRITE_LOCKS: dict[str, list] = {}
+_SPRITE_MEMO_LOCK = threading.Lock()
+
+
+@contextmanager
+def _sprite_lock(cache_path: str):
+    with _SPRITE_MEMO_LOCK:
+        entry = _SPRITE_LOCKS.get(cache_path)
+        if entry is None:
+            entry = _SPRITE_LOCKS[cache_path] = [threading.Lock(), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _SPRITE_MEMO_LOCK:
+            entry[1] -= 1
+            if not entry[1]:
+                del _SPRITE_LOCKS[cache_path]
+
+
+def _memo_get(cache_path: str) -> Image.Image | None:
+    with _SPRITE_MEMO_LOCK:
+        img = _SPRITE_MEMO.get(cache_path)
+        if img is not None:
+            _SPRITE_MEMO.move_to_end(cache_path)
+        return img
+
+
+def _memo_put(cache_path: str, img: Image.Image):
+    with _SPRITE_MEMO_LOCK:
+        _SPRITE_MEMO[cache_path] = img
+        _SPRITE_MEMO.move_to_end(cache_path)
+        while len(_SPRITE_MEMO) > Config.SPRITE_MEMO_SIZE:
+            _SPRITE_MEMO.popitem(last=False)
+
+
+def _retry_delay(attempt: int, response=None) -> float:
+    """Backoff before retry `attempt` (0-based): Retry-After when the API sends one, else exponential with jitter."""
+    try:
+        retry_after = float(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        retry_after = None
+    if retry_after is None:
+        retry_after = Config.IMAGE_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.8, 1.2)
+    return max(0.0, min(Config.RETRY_MAX_DELAY, retry_after))
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and dropped connections are worth another try."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return bool(status) and (status == 429 or status >= 500)
+
+
 class OpenAIClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, run: RunConfig | None = None, log=print):
         self.api_key = api_key
+        self.run = run or RunConfig()
+        # Progress/diagnostic lines; a generation run passes its _RunLog so everything it triggers stays in order.
+        self.log = log
+        self.session = _http_session(hashlib.blake2s(api_key.encode("utf-8")).hexdigest())
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}"
         }
-        self.last_image_was_fallback = False
-        self.last_image_error = None
+        # Fallback status of the calling thread's last generate_image (sprites are generated concurrently).
+        self._local = threading.local()
+
+    @property
+    def last_image_was_fallback(self) -> bool:
+        return getattr(self._local, "was_fallback", False)
+
+    @last_image_was_fallback.setter
+    def last_image_was_fallback(self, value: bool):
+        self._local.was_fallback = value
+
+    @property
+    def last_image_error(self) -> str | None:
+        return getattr(self._local, "error", None)
+
+    @last_image_error.setter
+    def last_image_error(self, value: str | None):
+        self._local.error = value
     
-    def generate_text(self, prompt: str) -> str:
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=self.headers,
-            json={
-                "model": Config.TEXT_MODEL,
-                "messages": [
-                    {"role": "system", "content": "You are a game designer. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 2500,
-                "temperature": 0.6
-            }
-        )
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+    def generate_text(self, prompt: str, max_tokens: int = 2500, json_mode: bool = False) -> str:
+        body = {
+            "model": self.run.text_model,
+            "messages": [
+                {"role": "system", "content": "You are a game designer. Return only valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.6
+        }
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+        for attempt in range(Config.TEXT_MAX_RETRIES):
+            try:
+                response = self.session.post(
+                    "https://api.openai.com/v1/chat/completions",
+                    headers=self.headers,
+                    json=body,
+                    timeout=Config.HTTP_TIMEOUT,
+                )
+                response.raise_for_status()
+                return _json_loads(response.content)["choices"][0]["message"]["content"]
+            except requests.exceptions.RequestException as e:
+                if attempt + 1 >= Config.TEXT_MAX_RETRIES or not _is_retryable(e):
+                    raise
+                time.sleep(_retry_delay(attempt, getattr(e, "response", None)))
     
     def generate_image(self, prompt: str, role: str = "sprite", theme: str = "") -> Image.Image:
         """Generate a character/item sprite"""
         self.last_image_was_fallback = False
         self.last_image_error = None
-        cache_dir = "generated_sprites"
-        try:
-            os.makedirs(cache_dir, exist_ok=True)
-        except Exception:
-            cache_dir = None
-
-        # Cache images by (model, quality, role, prompt) so repeated runs are cheaper.
-        cache_key = None
-        cache_path = None
-        if cache_dir:
-            h = hashlib.sha256()
-            h.update((Config.IMAGE_MODEL + "|" + str(Config.IMAGE_QUALITY) + "|" + role + "|" + prompt).encode("utf-8"))
-            cache_key = h.hexdigest()[:24]
-            cache_path = os.path.join(cache_dir, f"cache_{cache_key}.png")
-            if os.path.exists(cache_path):
+        cache_path = self._image_cache_path(prompt, role)
+        # Without a disk cache, memoize under the same (model, quality, role, prompt) identity.
+        memo_key = cache_path or f"{Config.IMAGE_MODEL}|{self.run.image_quality}|{role}|{prompt}"
+        with _sprite_lock(memo_key):
+            img = _memo_get(memo_key)
+            if img is None and cache_path and os.path.exists(cache_path):
                 try:
-                    return Image.open(cache_path).convert("RGBA")
+                    img = Image.open(cache_path).convert("RGBA")
                 except Exception:
-                    pass
-        role_hint = {
-            "player": "playable hero",
-            "npc": "NPC character",
-            "npc_healed": "NPC character (healed/happy)",
-            "item": "collectible item",
-            "key": "key item",
-            "chest": "treasure chest prop",
-            "door": "door prop",
-            "cauldron": "alchemy cauldron prop",
-            "prop": "interactive prop",
-        }.get(role, "sprite")
-
-        # Role-specific quality prompts to prevent vague blobs
-        role_details = {
-            "player": "Full-body single character. Clear face, hair, hands, boots. Distinct silhouette.",
-            "npc": "Full-body single character. Clear face, hair, hands, boots. Distinct silhouette.",
-            "npc_healed": "Full-body single character. Clear face, hair, hands, boots. Distinct silhouette.",
-            "key": "Single ornate brass key with visible teeth and keyring hole. Crisp outline.",
-            "chest": "Single wooden treasure chest with metal bands and latch. 3/4 top-down view.",
-            "door": "Single wooden door or stone arch door with clear handle/lock. 3/4 top-down view.",
-            "cauldron": "Single iron cauldron with glowing liquid and small details (runes, bubbles). 3/4 top-down view.",
-            "item": "Single item only. Clean outline. Clear shape and material.",
-        }
-        detail = role_details.get(role, "Single prop only. Clean outline. Clear function.")
-        subject = f"{prompt}. {detail} {role_hint}."
+                    img = None
+            if img is None:
+                img = self._request_image(prompt, role, theme, cache_path)
+                if self.last_image_was_fallback:
+                    return img
+            _memo_put(memo_key, img)
+        # Callers may draw on their sprite; keep the memoized one pristine.
+        return img.copy()
+
+    def _request_image(self, prompt: str, role: str, theme: str, cache_path: str | None) -> Image.Image:
+        styled_prompt = self._styled_image_prompt(prompt, role, theme)
 
-        styled_prompt = f"""Create a single video game {role} sprite in high-quality 32-bit pixel art style.
-Style goals: clean outlines, readable silhouette, rich shading, cozy lighting, classic JRPG overworld look.
-Reference: 32-bit RPG character style (crisp pixels, higher color depth, detailed clothing).
-Avoid generic or blocky shapes. Use 8-16 distinct colors with strong contrast; do NOT be monochrome.
-If character: include face, hair, layered clothing, and at least one accessory or motif that fits the theme.
-If item/prop: make it unique, colorful, and readable at 128x128.
-IMPORTANT: output a SINGLE character or item only. Do NOT include multiple poses, sprite sheets, or multiple characters.
-Do NOT show multiple people in the image.
-No watermark, no UI, no text, no logos.
-No Minecraft/blocky style. No simple rectangles. No stick figures.
-The sprite should be on a plain solid GREEN background (#00FF00 bright green for chroma key).
-3/4 top-down or slight isometric view, centered in frame, full body visible.
-Character should fill most of the frame (75-90% height), not tiny.
-Sharp pixels, no blur.
-
-Theme: {theme}
-Subject: {subject}"""
-        
         last_err = None
         for attempt in range(Config.IMAGE_MAX_RETRIES):
             extra = ""
@@ -683,87 +888,241 @@ Subject: {subject}"""
                 extra += "\nSTRICT: close-up single subject. Fill the frame. Do not include background props."
 
             try:
-                response = requests.post(
-                    "https://api.openai.com/v1/images/generations",
-                    headers=self.headers,
-                    json={
-                        "model": Config.IMAGE_MODEL,
-                        "prompt": styled_prompt + extra,
-                        "n": 1,
-                        "size": "1024x1024",
-                        "quality": Config.IMAGE_QUALITY,
-                    }
-                )
+                with _IMAGE_SLOTS:
+                    response = self.session.post(
+                        "https://api.openai.com/v1/images/generations",
+                        headers=self.headers,
+                        json=self._image_body(styled_prompt + extra),
+                        timeout=Config.HTTP_TIMEOUT,
+                    )
                 response.raise_for_status()
-                payload = response.json()
-                data0 = payload.get("data", [{}])[0] if isinstance(payload.get("data"), list) else {}
-                image_data = data0.get("b64_json")
-                if not image_data and data0.get("url"):
-                    # Some image models/endpoints may return a URL; we do not support downloading in this app.
-                    raise RuntimeError("Image API returned a URL; expected base64. Try a GPT image model or update API settings.")
-                if not image_data:
-                    raise RuntimeError(f"Image API did not return b64_json (keys={list(data0.keys())})")
-                img = Image.open(BytesIO(base64.b64decode(image_data)))
-
-                # Resize and try to remove green background
-                img = img.resize((128, 128), Image.NEAREST)
-                img = self._remove_green_bg(img)
-
-                areas = self._component_areas(img)
-                img = self._crop_to_largest_component(img)
-                img = self._extract_largest_sprite(img)
-                img = self._fit_to_square(img, 128)
-
-                # If it likely contained multiple large subjects, retry with stricter prompt.
-                if len(areas) >= 2 and areas[1] > 0.45 * areas[0]:
-                    last_err = f"multi-subject output (areas={areas[:3]})"
-                    continue
-                # If it still looks like a strip/spritesheet after cropping, retry
-                if img.width > int(img.height * 1.25):
-                    last_err = "spritesheet-like aspect ratio"
-                    continue
-                if self._nontransparent_pixels(img) < 350:
-                    last_err = "too little sprite content"
+                img, last_err = self._sprite_from_payload(self._image_payload(response))
+                if img is None:
                     continue
-                if Config.DEBUG_SPRITES:
-                    try:
-                        os.makedirs("generated_sprites", exist_ok=True)
-                        ts = int(time.time() * 1000)
-                        img.save(os.path.join("generated_sprites", f"{ts}_{role}.png"))
-                    except Exception:
-                        pass
-                # Save cache
-                if cache_path:
-                    try:
-                        img.save(cache_path)
-                    except Exception:
-                        pass
+                self._keep_sprite(img, role, cache_path)
                 return img
             except requests.exceptions.HTTPError as e:
                 last_err = str(e)
-                status = getattr(getattr(e, "response", None), "status_code", None)
                 try:
                     if getattr(e, "response", None) is not None and e.response.text:
                         last_err = f"{last_err} | {e.response.text[:240]}"
                 except Exception:
                     pass
-                # Backoff for transient server errors
-                if status and status >= 500:
-                    delay = Config.IMAGE_RETRY_BASE_DELAY * (attempt + 1)
-                    time.sleep(delay)
+                # Backoff for rate limits and transient server errors
+                if _is_retryable(e):
+                    time.sleep(_retry_delay(attempt, e.response))
                     continue
                 break
             except Exception as e:
                 last_err = str(e)
-                delay = Config.IMAGE_RETRY_BASE_DELAY * (attempt + 1)
-                time.sleep(delay)
+                time.sleep(_retry_delay(attempt))
                 continue
 
-        print(f"Image fallback for role={role}: {last_err}")
+        self.log(f"Image fallback for role={role}: {last_err}")
         self.last_image_was_fallback = True
         self.last_image_error = last_err
         return self._placeholder(prompt, role)
-    
+
+    def generate_images_batch(self, jobs: list[tuple[str, str, str, str]], poll_seconds: float = 30.0) -> dict[str, Image.Image]:
+        """
+        Generate (key, prompt, role, theme) sprites through the Batch API (half price, finishes within 24h).
+        Returns the sprites that came back usable; callers generate the rest with generate_image.
+        """
+        auth = {"Authorization": self.headers["Authorization"]}
+        meta, lines = {}, []
+        for key, prompt, role, theme in jobs:
+            meta[key] = (role, self._image_cache_path(prompt, role))
+            lines.append(json.dumps({
+                "custom_id": key,
+                "method": "POST",
+                "url": "/v1/images/generations",
+                "body": self._image_body(self._styled_image_prompt(prompt, role, theme)),
+            }))
+        upload = self.session.post(
+            "https://api.openai.com/v1/files",
+            headers=auth,
+            data={"purpose": "batch"},
+            files={"file": ("sprites.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+            timeout=Config.HTTP_TIMEOUT,
+        )
+        upload.raise_for_status()
+        batch = self.session.post(
+            "https://api.openai.com/v1/batches",
+            headers=self.headers,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/images/generations",
+                "completion_window": "24h",
+            },
+            timeout=Config.HTTP_TIMEOUT,
+        )
+        batch.raise_for_status()
+        info = batch.json()
+        while info.get("status") not in ("completed", "failed", "expired", "cancelled"):
+            self.log(f"  batch {info.get('id')}: {info.get('status')} {info.get('request_counts') or ''}")
+            time.sleep(poll_seconds)
+            r = self.session.get(f"https://api.openai.com/v1/batches/{info['id']}", headers=auth, timeout=Config.HTTP_TIMEOUT)
+            r.raise_for_status()
+            info = r.json()
+        if not info.get("output_file_id"):
+            self.log(f"  batch {info.get('id')} ended as {info.get('status')} with no output")
+            return {}
+        r = self.session.get(f"https://api.openai.com/v1/files/{info['output_file_id']}/content", headers=auth, timeout=Config.HTTP_TIMEOUT)
+        r.raise_for_status()
+
+        sprites: dict[str, Image.Image] = {}
+        for line in r.text.splitlines():
+            try:
+                row = _json_loads(line)
+                key = row.get("custom_id")
+                if key not in meta:
+                    continue
+                resp = row.get("response") or {}
+                if resp.get("status_code") != 200:
+                    self.log(f"  batch sprite {key}: HTTP {resp.get('status_code')}")
+                    continue
+                img, err = self._sprite_from_payload(resp.get("body") or {})
+                if img is None:
+                    self.log(f"  batch sprite {key}: {err}")
+                    continue
+                role, cache_path = meta[key]
+                self._keep_sprite(img, role, cache_path)
+                if cache_path:
+                    _memo_put(cache_path, img.copy())
+                sprites[key] = img
+            except Exception as e:
+                self.log(f"  batch sprite line skipped: {e}")
+        return sprites
+
+    def _image_cache_path(self, prompt: str, role: str) -> str | None:
+        # Cache images by (model, quality, role, prompt) so repeated runs are cheaper.
+        cache_dir = "generated_sprites"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except Exception:
+            return None
+        h = hashlib.sha256()
+        h.update((Config.IMAGE_MODEL + "|" + str(self.run.image_quality) + "|" + role + "|" + prompt).encode("utf-8"))
+        return os.path.join(cache_dir, f"cache_{h.hexdigest()[:24]}.png")
+
+    def _image_body(self, styled_prompt: str) -> dict:
+        return {
+            "model": Config.IMAGE_MODEL,
+            "prompt": styled_prompt,
+            "n": 1,
+            "size": Config.IMAGE_SIZES.get(Config.IMAGE_MODEL, "1024x1024"),
+            "quality": self.run.image_quality,
+        }
+
+    _ROLE_HINTS = {
+        "player": "playable hero",
+        "npc": "NPC character",
+        "npc_healed": "NPC character (healed/happy)",
+        "item": "collectible item",
+        "key": "key item",
+        "chest": "treasure chest prop",
+        "door": "door prop",
+        "cauldron": "alchemy cauldron prop",
+        "prop": "interactive prop",
+    }
+
+    # Role-specific quality prompts to prevent vague blobs
+    _ROLE_DETAILS = {
+        "player": "Full-body single character. Clear face, hair, hands, boots. Distinct silhouette.",
+        "npc": "Full-body single character. Clear face, hair, hands, boots. Distinct silhouette.",
+        "npc_healed": "Full-body single character. Clear face, hair, hands, boots. Distinct silhouette.",
+        "key": "Single ornate brass key with visible teeth and keyring hole. Crisp outline.",
+        "chest": "Single wooden treasure chest with metal bands and latch. 3/4 top-down view.",
+        "door": "Single wooden door or stone arch door with clear handle/lock. 3/4 top-down view.",
+        "cauldron": "Single iron cauldron with glowing liquid and small details (runes, bubbles). 3/4 top-down view.",
+        "item": "Single item only. Clean outline. Clear shape and material.",
+    }
+
+    def _styled_image_prompt(self, prompt: str, role: str, theme: str) -> str:
+        role_hint = self._ROLE_HINTS.get(role, "sprite")
+        detail = self._ROLE_DETAILS.get(role, "Single prop only. Clean outline. Clear function.")
+        subject = f"{prompt}. {detail} {role_hint}."
+
+        return f"""Create a single video game {role} sprite in high-quality 32-bit pixel art style.
+Style goals: clean outlines, readable silhouette, rich shading, cozy lighting, classic JRPG overworld look.
+Reference: 32-bit RPG character style (crisp pixels, higher color depth, detailed clothing).
+Avoid generic or blocky shapes. Use 8-16 distinct colors with strong contrast; do NOT be monochrome.
+If character: include face, hair, layered clothing, and at least one accessory or motif that fits the theme.
+If item/prop: make it unique, colorful, and readable at 128x128.
+IMPORTANT: output a SINGLE character or item only. Do NOT include multiple poses, sprite sheets, or multiple characters.
+Do NOT show multiple people in the image.
+No watermark, no UI, no text, no logos.
+No Minecraft/blocky style. No simple rectangles. No stick figures.
+The sprite should be on a plain solid GREEN background (#00FF00 bright green for chroma key).
+3/4 top-down or slight isometric view, centered in frame, full body visible.
+Character should fill most of the frame (75-90% height), not tiny.
+Sharp pixels, no blur.
+
+Theme: {theme}
+Subject: {subject}"""
+
+    @staticmethod
+    def _image_payload(response) -> dict:
+        """
+        Slice b64_json straight out of the response bytes instead of building the ~1.4 MB str and dict
+        that response.json() would; falls back to .json() for anything unexpected (e.g. escaped chars).
+        """
+        raw = response.content
+        key = raw.find(b'"b64_json"')
+        if key != -1:
+            start = raw.find(b'"', raw.find(b":", key) + 1) + 1
+            end = raw.find(b'"', start)
+            if 0 < start < end and raw.find(b"\\", start, end) == -1:
+                return {"data": [{"b64_json": memoryview(raw)[start:end]}]}
+        return _json_loads(raw)
+
+    def _sprite_from_payload(self, payload: dict) -> tuple[Image.Image | None, str | None]:
+        """Decode and clean one image response; returns (None, reason) when the sprite should be retried."""
+        data0 = payload.get("data", [{}])[0] if isinstance(payload.get("data"), list) else {}
+        image_data = data0.get("b64_json")
+        if not image_data and data0.get("url"):
+            # Some image models/endpoints may return a URL; we do not support downloading in this app.
+            raise RuntimeError("Image API returned a URL; expected base64. Try a GPT image model or update API settings.")
+        if not image_data:
+            raise RuntimeError(f"Image API did not return b64_json (keys={list(data0.keys())})")
+        img = Image.open(BytesIO(base64.b64decode(image_data)))
+
+        # Resize and try to remove green background
+        img = img.resize((128, 128), Image.NEAREST)
+        img = self._remove_green_bg(img)
+
+        # One flood-fill pass serves both the multi-subject check and the crop.
+        components = self._connected_components(img)
+        areas = [area for area, _ in components]
+        img = self._crop_to_largest_component(img, components)
+        img = self._extract_largest_sprite(img)
+        img = self._fit_to_square(img, 128)
+
+        # If it likely contained multiple large subjects, retry with stricter prompt.
+        if len(areas) >= 2 and areas[1] > 0.45 * areas[0]:
+            return None, f"multi-subject output (areas={areas[:3]})"
+        # If it still looks like a strip/spritesheet after cropping, retry
+        if img.width > int(img.height * 1.25):
+            return None, "spritesheet-like aspect ratio"
+        if self._nontransparent_pixels(img) < 350:
+            return None, "too little sprite content"
+        return img, None
+
+    def _keep_sprite(self, img: Image.Image, role: str, cache_path: str | None):
+        if Config.DEBUG_SPRITES:
+            try:
+                os.makedirs("generated_sprites", exist_ok=True)
+                ts = int(time.time() * 1000)
+                img.save(os.path.join("generated_sprites", f"{ts}_{role}.png"))
+            except Exception:
+                pass
+        # Save cache
+        if cache_path:
+            try:
+                img.save(cache_path)
+            except Exception:
+                pass
+
     def _remove_green_bg(self, img: Image.Image) -> Image.Image:
         """Remove bright green background"""
         img = img.convert("RGBA")
@@ -792,20 +1151,8 @@ Subject: {subject}"""
 
     def _nontransparent_bbox(self, img: Image.Image):
         """Return (min_x, min_y, max_x, max_y) of non-transparent pixels, or None."""
-        img = img.convert("RGBA")
-        pixels = img.load()
-        min_x, min_y = img.width, img.height
-        max_x, max_y = 0, 0
-        found = False
-        for y in range(img.height):
-            for x in range(img.width):
-                if pixels[x, y][3] > 0:
-                    found = True
-                    min_x = min(min_x, x)
-                    min_y = min(min_y, y)
-                    max_x = max(max_x, x)
-                    max_y = max(max_y, y)
-        return (min_x, min_y, max_x, max_y) if found else None
+        bbox = img.convert("RGBA").getchannel("A").getbbox()
+        return (bbox[0], bbox[1], bbox[2] - 1, bbox[3] - 1) if bbox else None
 
     def _connected_components(self, img: Image.Image) -> list[tuple[int, tuple]]:
         """Return [(area, (x0, y0, x1, y1)), ...] sorted largest-first."""
@@ -854,17 +1201,14 @@ Subject: {subject}"""
         canvas.paste(resized, (ox, oy), resized)
         return canvas
 
-    def _crop_to_largest_component(self, img: Image.Image) -> Image.Image:
+    def _crop_to_largest_component(self, img: Image.Image, components: list | None = None) -> Image.Image:
         """Crop to the largest connected non-transparent component."""
-        components = self._connected_components(img)
+        if components is None:
+            components = self._connected_components(img)
         if components and components[0][0] > 30:
             return img.crop(components[0][1])
         return img
 
-    def _component_areas(self, img: Image.Image) -> list:
-        """Return connected-component areas (largest first)."""
-        return [area for area, _ in self._connected_components(img)]
-
     def _extract_largest_sprite(self, img: Image.Image) -> Image.Image:
         """Heuristic: if image looks like a sprite sheet, crop the densest column."""
         bbox = self._nontransparent_bbox(img)
@@ -878,14 +1222,13 @@ Subject: {subject}"""
 
         # Sprite sheet likely: split into 3 or 4 columns and pick densest
         img = img.convert("RGBA")
-        pixels = img.load()
         columns = 3 if w / h < 3.5 else 4
         best = None
         best_count = -1
         for i in range(columns):
             x0 = int(min_x + i * w / columns)
             x1 = int(min_x + (i + 1) * w / columns)
-            count = sum(1 for y in range(min_y, max_y + 1) for x in range(x0, x1) if pixels[x, y][3] > 0)
+            count = self._nontransparent_pixels(img.crop((x0, min_y, x1, max_y + 1)))
             if count > best_count:
                 best_count = count
                 best = (x0, min_y, x1, max_y + 1)
@@ -894,79 +1237,79 @@ Subject: {subject}"""
         return img
 
     def _nontransparent_pixels(self, img: Image.Image) -> int:
-        img = img.convert("RGBA")
-        pixels = img.load()
-        return sum(1 for y in range(img.height) for x in range(img.width) if pixels[x, y][3] > 0)
+        # Alpha histogram bucket 0 holds the fully transparent pixels.
+        alpha = img.convert("RGBA").getchannel("A")
+        return alpha.width * alpha.height - alpha.histogram()[0]
+
+    # Placeholder art, in match priority order: (shape, keywords, rects) with inclusive (x0, y0, x1, y1, color) rects.
+    _PLACEHOLDER_ITEMS = (
+        ("key", ("key",), [(26,28,38,32,(240,210,80,255)), (22,26,26,34,(240,210,80,255)), (36,32,40,34,(200,170,60,255))]),
+        ("chest", ("chest",), [(18,30,46,46,(150,90,50,255)), (18,28,46,33,(180,120,70,255)), (30,36,34,40,(230,200,90,255))]),
+        ("door", ("door",), [(20,18,44,52,(120,80,60,255)), (22,22,42,50,(150,100,70,255)), (38,34,40,36,(220,200,90,255))]),
+        ("cauldron", ("cauldron", "potion"), [(22,34,42,48,(60,60,70,255)), (24,30,40,34,(120,255,140,255)), (28,32,30,34,(255,255,255,255))]),
+        # Generic item fallback
+        ("orb", ("orb", "gem", "lantern"), [(26,28,38,40,(120,180,255,255)), (28,30,36,38,(200,240,255,255))]),
+    )
+    # Torso variants: extra rects on top of the base outfit (None = outfit color).
+    _PLACEHOLDER_TORSOS = (
+        ("wizard", ("wizard", "mage", "robe"), [(22,28,42,46,None), (30,28,34,46,None), (44,26,46,52,(120,80,50,255)), (42,24,48,28,(120,200,255,255))]),
+        ("princess", ("princess", "queen"), [(22,28,42,46,None), (24,30,40,34,None), (28,14,36,18,(240,210,80,255)), (30,12,34,14,(240,210,80,255))]),
+        ("king", ("king",), [(22,28,42,44,None), (22,36,42,38,None), (28,14,36,18,(240,210,80,255)), (26,18,38,20,(200,50,50,255))]),
+    )
+    # Every placeholder keyword in one pattern; the lookahead also reports overlapping matches.
+    _PLACEHOLDER_WORDS = re.compile(
+        "(?=(" + "|".join(w for _, words, _ in _PLACEHOLDER_ITEMS + _PLACEHOLDER_TORSOS for w in words) + "))"
+    )
 
     def _placeholder(self, prompt: str, role: str = "sprite") -> Image.Image:
         """Fallback pixel sprite with multiple colors (no purple blocks)."""
-        p = prompt.lower()
+        found = set(self._PLACEHOLDER_WORDS.findall(prompt.lower()))
+        for shape, words, _ in self._PLACEHOLDER_ITEMS:
+            if found.intersection(words):
+                return self._placeholder_art(shape, False).copy()
+        torso = next((shape for shape, words, _ in self._PLACEHOLDER_TORSOS if found.intersection(words)), None)
+        return self._placeholder_art(torso, role in ["npc", "npc_healed"]).copy()
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _placeholder_art(cls, shape: str | None, npc: bool) -> Image.Image:
+        """Draw one placeholder variant; there are only a few, so each is drawn once and copied out."""
         img = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
-        px = img.load()
 
         def draw_rect(x0, y0, x1, y1, color):
-            for y in range(y0, y1 + 1):
-                for x in range(x0, x1 + 1):
-                    px[x, y] = color
+            # Inclusive corners; paste fills the box in C instead of per-pixel access.
+            img.paste(color, (x0, y0, x1 + 1, y1 + 1))
 
         def outline():
+            # Transparent pixels 4-adjacent to the shape: shift-OR the alpha mask, minus the mask itself.
+            mask = img.getchannel("A").point(lambda a: 255 if a else 0)
+            grown = Image.new("L", img.size, 0)
+            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                grown.paste(255, (dx, dy), mask)
+            ring = ImageChops.subtract(grown, mask)
             img_copy = img.copy()
-            p2 = img_copy.load()
-            for y in range(64):
-                for x in range(64):
-                    if px[x, y][3] > 0:
-                        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                            nx, ny = x + dx, y + dy
-                            if 0 <= nx < 64 and 0 <= ny < 64 and px[nx, ny][3] == 0:
-                                p2[nx, ny] = (25, 25, 35, 255)
+            img_copy.paste((25, 25, 35, 255), (0, 0), ring)
             return img_copy
 
-        # Item shapes: keyword -> list of (x0, y0, x1, y1, color) rects
-        item_shapes = {
-            "key": [(26,28,38,32,(240,210,80,255)), (22,26,26,34,(240,210,80,255)), (36,32,40,34,(200,170,60,255))],
-            "chest": [(18,30,46,46,(150,90,50,255)), (18,28,46,33,(180,120,70,255)), (30,36,34,40,(230,200,90,255))],
-            "door": [(20,18,44,52,(120,80,60,255)), (22,22,42,50,(150,100,70,255)), (38,34,40,36,(220,200,90,255))],
-            "cauldron": [(22,34,42,48,(60,60,70,255)), (24,30,40,34,(120,255,140,255)), (28,32,30,34,(255,255,255,255))],
-        }
-        # Check for item keywords
-        for keyword, rects in item_shapes.items():
-            if keyword in p or (keyword == "cauldron" and "potion" in p):
-                for x0, y0, x1, y1, color in rects:
-                    draw_rect(x0, y0, x1, y1, color)
-                return outline()
-        # Generic item fallback
-        if any(k in p for k in ["orb", "gem", "lantern"]):
-            draw_rect(26, 28, 38, 40, (120, 180, 255, 255))
-            draw_rect(28, 30, 36, 38, (200, 240, 255, 255))
+        item_rects = {name: rects for name, _, rects in cls._PLACEHOLDER_ITEMS}
+        if shape in item_rects:
+            for x0, y0, x1, y1, color in item_rects[shape]:
+                draw_rect(x0, y0, x1, y1, color)
             return outline()
 
         # Character placeholder
         skin = (240, 200, 170, 255)
         hair = (90, 60, 30, 255)
-        outfit1 = (180, 120, 60, 255) if role in ["npc", "npc_healed"] else (70, 130, 220, 255)
-        outfit2 = (90, 140, 90, 255) if role in ["npc", "npc_healed"] else (220, 80, 80, 255)
+        outfit1 = (180, 120, 60, 255) if npc else (70, 130, 220, 255)
+        outfit2 = (90, 140, 90, 255) if npc else (220, 80, 80, 255)
 
         # Head + hair (shared by all characters)
-        for y in range(18, 28):
-            for x in range(26, 38):
-                px[x, y] = skin
+        draw_rect(26, 18, 37, 27, skin)
         draw_rect(26, 18, 38, 21, hair)
 
-        # Torso variants: keyword -> extra rects on top of the base outfit
-        torso_extras = {
-            "wizard": [(22,28,42,46,None), (30,28,34,46,None), (44,26,46,52,(120,80,50,255)), (42,24,48,28,(120,200,255,255))],
-            "princess": [(22,28,42,46,None), (24,30,40,34,None), (28,14,36,18,(240,210,80,255)), (30,12,34,14,(240,210,80,255))],
-            "king": [(22,28,42,44,None), (22,36,42,38,None), (28,14,36,18,(240,210,80,255)), (26,18,38,20,(200,50,50,255))],
-        }
-        matched = None
-        for keyword in torso_extras:
-            aliases = {"wizard": ["wizard", "mage", "robe"], "princess": ["princess", "queen"]}.get(keyword, [keyword])
-            if any(a in p for a in aliases):
-                matched = keyword
-                break
-
-        if matched:
-            for i, (x0, y0, x1, y1, color) in enumerate(torso_extras[matched]):
+        torso_rects = {name: rects for name, _, rects in cls._PLACEHOLDER_TORSOS}
+        if shape in torso_rects:
+            for i, (x0, y0, x1, y1, color) in enumerate(torso_rects[shape]):
                 draw_rect(x0, y0, x1, y1, color or (outfit1 if i == 0 else outfit2))
         else:
             draw_rect(24, 28, 40, 40, outfit1)
@@ -1027,6 +1370,80 @@ class GameDesigner:
         return player, npc
     
     def design_game(self, user_prompt: str, quest_plan_override: list[str] | None = None) -> dict:
+        design_prompt, quest_type_hint, quest_plan_override = self._design_spec(user_prompt, quest_plan_override)
+        self.client.log("Generating game design...")
+        response = self._design_text(("level", user_prompt, quest_plan_override), design_prompt)
+        return self._finish_design(self._parse_design_json(response), user_prompt, quest_type_hint, quest_plan_override)
+
+    def design_games_batch(self, prompts: list[str], plans: list[list[str]]) -> list[dict]:
+        """Design several levels with one text call; returns one normalized game per prompt."""
+        specs = [self._design_spec(p, plan) for p, plan in zip(prompts, plans)]
+        sections = [f"=== LEVEL {i+1} ===\n{spec[0]}" for i, spec in enumerate(specs)]
+        batch_prompt = (
+            f"Design {len(specs)} separate levels. Each level section below has its own prompt, schema and rules.\n"
+            f'Return ONLY JSON of the form {{"levels": [level1, level2, ...]}} with exactly {len(specs)} level objects, in order.\n\n'
+            + "\n\n".join(sections)
+        )
+        self.client.log(f"Generating {len(specs)} game designs (batched)...")
+        response = self._design_text(("batch", prompts, [spec[2] for spec in specs]), batch_prompt, max_tokens=2500 * len(specs), json_mode=True)
+        parsed = self._parse_design_json(response)
+        levels = parsed.get("levels") if isinstance(parsed, dict) else None
+        if not isinstance(levels, list) or not levels:
+            raise ValueError("batched design response had no levels")
+        games = []
+        for i, (p, spec) in enumerate(zip(prompts, specs)):
+            raw = levels[i] if i < len(levels) and isinstance(levels[i], dict) else None
+            games.append(self._finish_design(raw, p, spec[1], spec[2]))
+        return games
+
+    def _design_text(self, cache_parts: tuple, prompt: str, **kwargs) -> str:
+        """
+        Model response for a design prompt. With Config.CACHE_DESIGNS, a request with the same model,
+        prompt(s) and goal plan replays the stored response from DESIGN_CACHE_DIR.
+        """
+        if not Config.CACHE_DESIGNS:
+            return self.client.generate_text(prompt, **kwargs)
+        key = hashlib.sha256(json.dumps([self.client.run.text_model, *cache_parts]).encode("utf-8")).hexdigest()[:24]
+        path = os.path.join(DESIGN_CACHE_DIR, f"{key}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            pass
+        response = self.client.generate_text(prompt, **kwargs)
+        # Only keep responses that parse; a broken design should get a fresh try next time.
+        if self._parse_design_json(response) is not None:
+            try:
+                os.makedirs(DESIGN_CACHE_DIR, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(response)
+            except OSError:
+                pass
+        return response
+
+    @staticmethod
+    def _parse_design_json(response: str):
+        response = response.strip()
+        if "```" in response:
+            response = response.split("```")[1]
+            if response.startswith("json"):
+                response = response[4:]
+        try:
+            return _json_loads(response.strip())
+        except ValueError:
+            # json.JSONDecodeError and orjson.JSONDecodeError both subclass ValueError.
+            return None
+
+    def _finish_design(self, game, user_prompt: str, quest_type_hint: str, quest_plan_override: list[str]) -> dict:
+        try:
+            if isinstance(game, dict):
+                return self._normalize_game(game, user_prompt=user_prompt, quest_plan_override=quest_plan_override)
+        except Exception:
+            pass
+        return self._normalize_game(self._fallback(user_prompt, quest_type_hint), user_prompt=user_prompt, quest_plan_override=quest_plan_override)
+
+    def _design_spec(self, user_prompt: str, quest_plan_override: list[str] | None = None):
+        """Build the design prompt for one level; returns (prompt, quest_type_hint, normalized plan)."""
         global LAST_QUEST_TYPE
         quest_types = list(ALLOWED_GOALS)
         quest_plan_override = _normalize_quest_types(quest_plan_override or [])
@@ -1124,21 +1541,7 @@ RULES:
 - Dialogue must be 1-2 short sentences each (no cutoff), with clear direction for what to do next.
 - The quest goal and steps must reference concrete nouns (NPC name, item names, place names) and be logically consistent.
 - This is a peaceful exploration game, no combat'''
-
-        print("Generating game design...")
-        response = self.client.generate_text(design_prompt)
-        
-        response = response.strip()
-        if "```" in response:
-            response = response.split("```")[1]
-            if response.startswith("json"):
-                response = response[4:]
-        
-        try:
-            game = json.loads(response.strip())
-            return self._normalize_game(game, user_prompt=user_prompt, quest_plan_override=quest_plan_override)
-        except:
-            return self._normalize_game(self._fallback(user_prompt, quest_type_hint), user_prompt=user_prompt, quest_plan_override=quest_plan_override)
+        return design_prompt, quest_type_hint, quest_plan_override
 
     def _normalize_game(self, game: dict, user_prompt: str = "", quest_plan_override: list[str] | None = None) -> dict:
         """Ensure required quest fields exist and sanitize missing data."""
@@ -1469,14 +1872,18 @@ RULES:
 # ============================================================
 
 class SpriteGenerator:
-    def __init__(self, client: OpenAIClient, delay: float = 0.5):
+    def __init__(self, client: OpenAIClient, workers: int = Config.IMAGE_CONCURRENCY, log=None):
         self.client = client
-        self.delay = delay
+        self.workers = max(1, workers)
+        self.log = log or client.log
+        self.item_sprites = client.run.item_sprites_per_level
+        self._pool = None
+        self._pending: dict = {}
 
     def _gen(self, desc: str, role: str, theme: str) -> Image.Image:
         img = self.client.generate_image(desc, role=role, theme=theme)
         if self.client.last_image_was_fallback:
-            print(f"    ⚠ fallback sprite for {role}: {self.client.last_image_error}")
+            self.log(f"    ⚠ fallback sprite for {role}: {self.client.last_image_error}")
         return img
 
     def _baked_or_gen(self, baked_key: str, desc: str, role: str, theme: str) -> Image.Image:
@@ -1493,29 +1900,29 @@ class SpriteGenerator:
             return baked
         return self._fallback_character("item")
 
-    def _baked_reuse_or_gen(
-        self,
-        baked_key: str,
-        reuse_img: Image.Image | None,
-        desc: str,
-        role: str,
-        theme: str,
-    ) -> Image.Image:
-        """Load baked sprite first, then reuse, then generate."""
-        baked = _load_baked_sprite(baked_key)
-        if baked is not None:
-            return baked
-        if reuse_img is not None:
-            return reuse_img
-        return self._gen(desc, role=role, theme=theme)
-
     def _emit_sprite(self, sprites: dict, key: str, label: str, loader):
-        """Small helper to keep sprite-generation flow readable."""
-        print(f"  {label}...")
-        sprites[key] = loader()
-        time.sleep(self.delay)
-    
+        """Start one sprite on the pool; generate_all collects it into `sprites`."""
+        self.log(f"  {label}...")
+        self._pending[key] = self._pool.submit(loader)
+
     def generate_all(self, game: dict, reuse_player_sprite: Image.Image | None = None) -> dict:
+        # Sprite requests are independent I/O waits; run them concurrently and collect at the end.
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            self._pool, self._pending = pool, {}
+            try:
+                sprites = self._generate_all(game, reuse_player_sprite)
+                for key, fut in self._pending.items():
+                    sprites[key] = fut.result()
+            finally:
+                self._pool, self._pending = None, {}
+        # Without a second item sprite, the second item mirrors the first.
+        if "item2" not in sprites and "item" in sprites and game.get("quest", {}).get("items", [])[1:]:
+            sprites["item2"] = sprites["item"]
+        total_calls = len(sprites)
+        self.log(f"\n  Total API calls: {total_calls}")
+        return sprites
+
+    def _generate_all(self, game: dict, reuse_player_sprite: Image.Image | None) -> dict:
         sprites = {}
         quest = game.get("quest", {})
         quest_types = _normalize_quest_types(
@@ -1541,21 +1948,13 @@ class SpriteGenerator:
             lambda: self._gen(game["npc"]["sprite_desc"], role="npc", theme=theme),
         )
 
-        # Indoor NPCs: reuse across levels when possible to reduce API calls.
-        reuse_shop = game.get("_reuse_sprites", {}).get("npc_shop")
-        reuse_inn = game.get("_reuse_sprites", {}).get("npc_inn")
-        reuse_guest_a = game.get("_reuse_sprites", {}).get("npc_guest_a")
-        reuse_guest_b = game.get("_reuse_sprites", {}).get("npc_guest_b")
-        reuse_building_shop = game.get("_reuse_sprites", {}).get("building_shop")
-        reuse_building_inn = game.get("_reuse_sprites", {}).get("building_inn")
-
+        # Indoor NPCs: fixed descriptions, so every level of a run gets the same memoized sprite.
         self._emit_sprite(
             sprites,
             "npc_shop",
             "npc_shop",
-            lambda: self._baked_reuse_or_gen(
+            lambda: self._baked_or_gen(
                 baked_key="npc_shop",
-                reuse_img=reuse_shop,
                 desc="shopkeeper in layered robes and apron, potion vials on belt, kind face, distinctive hat or hood",
                 role="npc",
                 theme=theme,
@@ -1566,9 +1965,8 @@ class SpriteGenerator:
             sprites,
             "npc_inn",
             "npc_inn",
-            lambda: self._baked_reuse_or_gen(
+            lambda: self._baked_or_gen(
                 baked_key="npc_inn",
-                reuse_img=reuse_inn,
                 desc="innkeeper in warm tavern clothes (vest, rolled sleeves), friendly smile, holding a towel or mug, cozy vibe",
                 role="npc",
                 theme=theme,
@@ -1580,9 +1978,8 @@ class SpriteGenerator:
             sprites,
             "npc_guest_a",
             "npc_guest_a",
-            lambda: self._baked_reuse_or_gen(
+            lambda: self._baked_or_gen(
                 baked_key="npc_guest_a",
-                reuse_img=reuse_guest_a,
                 desc="ONE full-body inn guest sprite, top-down RPG pixel style, unique outfit and silhouette, transparent background, no frame",
                 role="npc",
                 theme="retro-rpg-interior",
@@ -1592,9 +1989,8 @@ class SpriteGenerator:
             sprites,
             "npc_guest_b",
             "npc_guest_b",
-            lambda: self._baked_reuse_or_gen(
+            lambda: self._baked_or_gen(
                 baked_key="npc_guest_b",
-                reuse_img=reuse_guest_b,
                 desc="ONE full-body inn guest sprite, top-down RPG pixel style, different hair/clothes from guest A, transparent background, no frame",
                 role="npc",
                 theme="retro-rpg-interior",
@@ -1604,50 +2000,35 @@ class SpriteGenerator:
         # Building/interior set pieces (prefer baked).
         interior_style_theme = "retro-rpg-interior"
         env_props = [
-            ("building_shop", "Shop exterior", "pixel-art top-down RPG shop building exterior with red roof, centered door, windows", reuse_building_shop),
-            ("building_inn", "Inn exterior", "pixel-art top-down RPG inn building exterior, warm roof, large entrance, welcoming sign", reuse_building_inn),
+            ("building_shop", "Shop exterior", "pixel-art top-down RPG shop building exterior with red roof, centered door, windows"),
+            ("building_inn", "Inn exterior", "pixel-art top-down RPG inn building exterior, warm roof, large entrance, welcoming sign"),
             ("shop_counter", "Shop counter", "top-down pixel RPG shop counter, polished wood, books and potion bottles, transparent background"),
             ("shop_shelf", "Shop shelf", "top-down pixel RPG wall shelf full of colorful bottles and goods, transparent background"),
             ("inn_desk", "Inn desk", "top-down pixel RPG inn reception desk with bell and ledger, transparent background"),
             ("inn_bed", "Inn bed", "top-down pixel RPG inn bedroom bed with blanket and pillow, transparent background"),
             ("inn_room_door", "Inn room door", "top-down pixel RPG wooden room door with number plaque and handle, transparent background"),
         ]
-        for row in env_props:
-            if len(row) == 4:
-                key, label, desc, reuse_img = row
-            else:
-                key, label, desc = row
-                reuse_img = None
+        for key, label, desc in env_props:
             self._emit_sprite(
                 sprites,
                 key,
                 label,
-                (
-                    (lambda k=key, d=desc, rimg=reuse_img: self._baked_reuse_or_gen(
-                        baked_key=k,
-                        reuse_img=rimg,
-                        desc=d,
-                        role="item",
-                        theme=interior_style_theme,
-                    ))
-                    if reuse_img is not None
-                    else (lambda k=key, d=desc: self._baked_or_gen(
-                        baked_key=k,
-                        desc=d,
-                        role="item",
-                        theme=interior_style_theme,
-                    ))
+                lambda k=key, d=desc: self._baked_or_gen(
+                    baked_key=k,
+                    desc=d,
+                    role="item",
+                    theme=interior_style_theme,
                 ),
             )
 
         # We intentionally avoid full-scene generated backdrops in runtime rendering.
         # Interiors are drawn deterministically in engine so interactions always line up.
         
-        # Quest items: generate up to N sprites based on Config.ITEM_SPRITES_PER_LEVEL.
+        # Quest items: generate up to N sprites based on the run's item_sprites_per_level.
         # Remaining items use a baked generic icon (if provided) or reuse the first generated sprite.
         baked_generic = _load_baked_sprite("item_generic")
         if items:
-            if Config.ITEM_SPRITES_PER_LEVEL >= 1:
+            if self.item_sprites >= 1:
                 self._emit_sprite(
                     sprites,
                     "item",
@@ -1657,15 +2038,15 @@ class SpriteGenerator:
             else:
                 sprites["item"] = baked_generic if baked_generic is not None else self._gen("simple collectible item icon", role="item", theme=theme)
             if len(items) > 1:
-                if Config.ITEM_SPRITES_PER_LEVEL >= 2:
+                if self.item_sprites >= 2:
                     self._emit_sprite(
                         sprites,
                         "item2",
                         "Second item",
                         lambda: self._gen(items[1]["sprite_desc"], role="item", theme=theme),
                     )
-                else:
-                    sprites["item2"] = baked_generic if baked_generic is not None else sprites.get("item")
+                elif baked_generic is not None:
+                    sprites["item2"] = baked_generic
         else:
             # Provide a default icon for indoor shelf displays.
             sprites["item"] = baked_generic if baked_generic is not None else self._gen("simple collectible item icon", role="item", theme=theme)
@@ -1804,9 +2185,6 @@ class SpriteGenerator:
                     theme=theme,
                 ),
             )
-        
-        total_calls = len(sprites)
-        print(f"\n  Total API calls: {total_calls}")
         return sprites
 
 
@@ -1967,6 +2345,9 @@ class TerrainRenderer:
         self.mw = config.MAP_WIDTH
         self.mh = config.MAP_HEIGHT
         
+        # Terrain style is chosen per run and recorded on the level.
+        self.classic = str(game.get("terrain_style") or Config.TERRAIN_STYLE).lower() == "classic"
+
         # Get palette
         time_of_day = game.get("time_of_day", "day")
         terrain_type = game.get("terrain", {}).get("type", "meadow")
@@ -2208,7 +2589,7 @@ class TerrainRenderer:
             else:
                 c = (*self._shift(self.palette["grass_light"], 10), orng.randint(12, 32))
             pygame.draw.circle(overlay, c, (x, y), r)
-        self.ground_overlay = overlay
+        self.ground_overlay = overlay.convert_alpha()
 
         # Global time tint improves smooth scene cohesion.
         tint = pygame.Surface((self.mw * self.ts, self.mh * self.ts), pygame.SRCALPHA)
@@ -2219,11 +2600,14 @@ class TerrainRenderer:
         elif self.time_of_day == "sunset":
             tint.fill((255, 120, 100, 38))
         else:
-            tint.fill((255, 255, 255, 0))
-        self.time_tint = tint
+            # Fully transparent: nothing to blit.
+            tint = None
+        self.time_tint = tint.convert_alpha() if tint is not None else None
     
     def generate_layout(self):
         """Generate terrain features"""
+        # The static terrain layer bakes in the water/path tiles; rebuild it for the new layout.
+        self._static_layer = None
         self.water_tiles = set()
         self.path_tiles = set()
         self.trees = []
@@ -2463,18 +2847,15 @@ class TerrainRenderer:
         map_rect = (0, 0, self.mw * ts, self.mh * ts)
         screen.fill(self.palette["bg"], map_rect)
 
-        if str(getattr(Config, "TERRAIN_STYLE", "smooth")).lower() == "classic":
+        if self.classic:
             self._draw_base_classic(screen, t)
         else:
             self._draw_base_smooth(screen, t)
 
         # Draw rocks
-        for rx, ry in self.rocks:
-            cx, cy = rx * ts + ts//2, ry * ts + ts//2
-            pygame.draw.ellipse(screen, self.palette["rock"], (cx - 15, cy - 10, 30, 20))
-            pygame.draw.ellipse(screen, (self.palette["rock"][0]+20, self.palette["rock"][1]+20, self.palette["rock"][2]+20),
-                               (cx - 10, cy - 8, 15, 10))
-            pygame.draw.ellipse(screen, (0, 0, 0), (cx - 16, cy + 6, 32, 8))
+        if self.rocks:
+            rock = _rock_sprite(tuple(self.palette["rock"]))
+            screen.blits([(rock, (rx * ts + ts//2 - 16, ry * ts + ts//2 - 10)) for rx, ry in self.rocks], doreturn=False)
 
         # Draw bushes
         for bx, by in self.bushes:
@@ -2572,48 +2953,146 @@ class TerrainRenderer:
             pygame.draw.line(screen, (60, 140, 80), (cx, cy - 14), (cx - 8, cy + 14), 3)
             pygame.draw.line(screen, (60, 140, 80), (cx + 4, cy - 12), (cx + 10, cy + 12), 2)
 
+    def anim_key(self, t: float = 0.0):
+        """Integer animation state of draw(t); equal keys mean identical pixels."""
+        wave = None
+        if self.water_tiles:
+            wave = int(t * 10) if self.classic else int(t * 14)
+        flowers = tuple(int(math.sin(t * 2 + phase) * 2) for _, _, _, phase in self.flowers)
+        trees = tuple(int(math.sin(t * 1.5 + tx) * 2) for tx, _ in self.trees)
+        return wave, flowers, trees
+
     def _draw_base_classic(self, screen, t: float = 0.0):
         ts = self.ts
-        for y in range(self.mh):
-            for x in range(self.mw):
-                rect = (x * ts, y * ts, ts, ts)
-                if (x, y) in self.water_tiles:
-                    pygame.draw.rect(screen, self.palette["water"], rect)
-                    pygame.draw.line(screen, self.palette["water_light"], (x * ts, y * ts), (x * ts + ts, y * ts), 1)
-                    wave = int((t * 10 + (x * 3 + y * 5)) % ts)
-                    pygame.draw.line(screen, self.palette["water_light"], (x * ts, y * ts + wave), (x * ts + ts, y * ts + wave), 2)
-                elif (x, y) in self.path_tiles:
-                    pygame.draw.rect(screen, self.palette["path"], rect)
-                    v = self.tile_variation.get((x, y), 0)
-                    if v == 0:
-                        pygame.draw.circle(screen, self.palette["grass_dark"], (x * ts + 10, y * ts + 12), 2)
-                    elif v == 1:
-                        pygame.draw.circle(screen, self.palette["grass_dark"], (x * ts + 22, y * ts + 18), 2)
-                    else:
-                        pygame.draw.circle(screen, self.palette["grass_dark"], (x * ts + 16, y * ts + 26), 2)
-                else:
-                    v = self.tile_variation.get((x, y), 0)
-                    color = self.palette["grass_light"] if v == 0 else self.palette["grass_dark"]
-                    pygame.draw.rect(screen, color, rect)
-                if (x + y) % 2 == 0:
-                    pygame.draw.line(screen, (0, 0, 0), (x * ts, y * ts), (x * ts + ts, y * ts), 1)
-                if (x + y) % 4 == 0:
-                    pygame.draw.line(screen, (255, 255, 255), (x * ts, y * ts), (x * ts, y * ts + ts), 1)
+        layer = self._static_layer
+        if layer is None:
+            # Grass and path tiles never change; draw the whole grid once (water is redrawn below).
+            layer = pygame.Surface((self.mw * ts, self.mh * ts))
+            try:
+                layer = layer.convert()
+            except pygame.error:
+                pass
+            layer.fill(self.palette["bg"])
+            for y in range(self.mh):
+                for x in range(self.mw):
+                    self._draw_classic_tile(layer, x, y, 0.0)
+            self._static_layer = layer
+        screen.blit(layer, (0, 0))
 
-    def _draw_base_smooth(self, screen, t: float = 0.0):
+        # Grid lines overrun their tile by a pixel, and the next tile used to paint over that.
+        # Clip each animated water tile to itself so the static neighbours stay as they were.
+        clip = screen.get_clip()
+        for (x, y) in self.water_tiles:
+            screen.set_clip(clip.clip((x * ts, y * ts, ts, ts)))
+            self._draw_classic_tile(screen, x, y, t)
+        screen.set_clip(clip)
+
+    def _draw_classic_tile(self, screen, x: int, y: int, t: float):
         ts = self.ts
+        rect = (x * ts, y * ts, ts, ts)
+        if (x, y) in self.water_tiles:
+            pygame.draw.rect(screen, self.palette["water"], rect)
+            pygame.draw.line(screen, self.palette["water_light"], (x * ts, y * ts), (x * ts + ts, y * ts), 1)
+            wave = int((t * 10 + (x * 3 + y * 5)) % ts)
+            pygame.draw.line(screen, self.palette["water_light"], (x * ts, y * ts + wave), (x * ts + ts, y * ts + wave), 2)
+        elif (x, y) in self.path_tiles:
+            pygame.draw.rect(screen, self.palette["path"], rect)
+            v = self.tile_variation.get((x, y), 0)
+            if v == 0:
+                pygame.draw.circle(screen, self.palette["grass_dark"], (x * ts + 10, y * ts + 12), 2)
+            elif v == 1:
+                pygame.draw.circle(screen, self.palette["grass_dark"], (x * ts + 22, y * ts + 18), 2)
+            else:
+                pygame.draw.circle(screen, self.palette["grass_dark"], (x * ts + 16, y * ts + 26), 2)
+        else:
+            v = self.tile_variation.get((x, y), 0)
+            color = self.palette["grass_light"] if v == 0 else self.palette["grass_dark"]
+            pygame.draw.rect(screen, color, rect)
+        if (x + y) % 2 == 0:
+            pygame.draw.line(screen, (0, 0, 0), (x * ts, y * ts), (x * ts + ts, y * ts), 1)
+        if (x + y) % 4 == 0:
+            pygame.draw.line(screen, (255, 255, 255), (x * ts, y * ts), (x * ts, y * ts + ts), 1)
+
+    def _smooth_static_layer(self) -> pygame.Surface:
+        """Ground, path and shoreline passes of the smooth style; none depend on t, so draw them once."""
+        layer = self._static_layer
+        if layer is not None:
+            return layer
+        ts = self.ts
+        layer = pygame.Surface((self.mw * ts, self.mh * ts))
+        try:
+            layer = layer.convert()
+        except pygame.error:
+            pass
+        layer.fill(self.palette["bg"])
         ground_tile = self.visual_tile_cache.get("ground")
-        path_tile = self.visual_tile_cache.get("path")
-        water_tile = self.visual_tile_cache.get("water")
 
         # Pass 1: ground base.
+        if ground_tile is not None:
+            layer.blits(
+                [(ground_tile, (x * ts, y * ts)) for y in range(self.mh) for x in range(self.mw)],
+                doreturn=False,
+            )
+
+        # Pass 2: path (tiles over water are drawn per frame, above the animated water).
+        for (x, y) in self.path_tiles - self.water_tiles:
+            self._draw_path_tile(layer, x, y)
+
+        # Pass 3: shoreline highlights on adjacent land tiles.
+        shore_light = self._shift(self.palette["water_light"], 16)
         for y in range(self.mh):
             for x in range(self.mw):
+                if (x, y) in self.water_tiles:
+                    continue
                 px, py = x * ts, y * ts
-                if ground_tile is not None:
-                    screen.blit(ground_tile, (px, py))
+                if (x, y - 1) in self.water_tiles:
+                    self._draw_edge_strip(layer, shore_light, px, py, "N", 2)
+                if (x + 1, y) in self.water_tiles:
+                    self._draw_edge_strip(layer, shore_light, px, py, "E", 2)
+                if (x, y + 1) in self.water_tiles:
+                    self._draw_edge_strip(layer, shore_light, px, py, "S", 2)
+                if (x - 1, y) in self.water_tiles:
+                    self._draw_edge_strip(layer, shore_light, px, py, "W", 2)
+
+        self._static_layer = layer
+        return layer
+
+    def _draw_path_tile(self, screen, x: int, y: int):
+        """One path tile with neighbor-aware connectors."""
+        ts = self.ts
+        path_tile = self.visual_tile_cache.get("path")
+        path_edge_dark = self._shift(self.palette["path"], -24)
+        path_edge_light = self._shift(self.palette["path"], 14)
+        conn_w = max(3, ts // 8)
+        px, py = x * ts, y * ts
+        if path_tile is not None:
+            screen.blit(path_tile, (px, py))
+        mask = self._neighbor_mask(self.path_tiles, x, y)
+        # Open edges get a darker trim; connected edges get slight bright center extension.
+        if not (mask & 1):
+            self._draw_edge_strip(screen, path_edge_dark, px, py, "N", conn_w)
+        else:
+            pygame.draw.rect(screen, path_edge_light, (px + ts // 4, py, ts // 2, conn_w))
+        if not (mask & 2):
+            self._draw_edge_strip(screen, path_edge_dark, px, py, "E", conn_w)
+        else:
+            pygame.draw.rect(screen, path_edge_light, (px + ts - conn_w, py + ts // 4, conn_w, ts // 2))
+        if not (mask & 4):
+            self._draw_edge_strip(screen, path_edge_dark, px, py, "S", conn_w)
+        else:
+            pygame.draw.rect(screen, path_edge_light, (px + ts // 4, py + ts - conn_w, ts // 2, conn_w))
+        if not (mask & 8):
+            self._draw_edge_strip(screen, path_edge_dark, px, py, "W", conn_w)
+        else:
+            pygame.draw.rect(screen, path_edge_light, (px, py + ts // 4, conn_w, ts // 2))
 
-        # Pass 2: water tiles with connected border logic.
+    def _draw_base_smooth(self, screen, t: float = 0.0):
+        ts = self.ts
+        water_tile = self.visual_tile_cache.get("water")
+        screen.blit(self._smooth_static_layer(), (0, 0))
+
+        # Water animates, so it is drawn over the static layer every frame. Every water and path
+        # stroke stays inside its own tile, so only path tiles laid over water are redrawn on top.
         shore_light = self._shift(self.palette["water_light"], 16)
         shore_dark = self._shift(self.palette["water"], -24)
         edge_w = max(2, ts // 10)
@@ -2629,6 +3108,9 @@ class TerrainRenderer:
                 (px + ts - 4, py + wave),
                 2,
             )
+            if wave == ts - 1 and y + 1 < self.mh and (x, y + 1) not in self.water_tiles:
+                # A wave on the last row bleeds into the land below; restore that tile's shoreline strip.
+                self._draw_edge_strip(screen, shore_light, px, py + ts, "N", 2)
             mask = self._neighbor_mask(self.water_tiles, x, y)
             if not (mask & 1):
                 self._draw_edge_strip(screen, shore_dark, px, py, "N", edge_w)
@@ -2638,48 +3120,8 @@ class TerrainRenderer:
                 self._draw_edge_strip(screen, shore_dark, px, py, "S", edge_w)
             if not (mask & 8):
                 self._draw_edge_strip(screen, shore_dark, px, py, "W", edge_w)
-
-        # Pass 3: path with neighbor-aware connectors.
-        path_edge_dark = self._shift(self.palette["path"], -24)
-        path_edge_light = self._shift(self.palette["path"], 14)
-        conn_w = max(3, ts // 8)
-        for (x, y) in self.path_tiles:
-            px, py = x * ts, y * ts
-            if path_tile is not None:
-                screen.blit(path_tile, (px, py))
-            mask = self._neighbor_mask(self.path_tiles, x, y)
-            # Open edges get a darker trim; connected edges get slight bright center extension.
-            if not (mask & 1):
-                self._draw_edge_strip(screen, path_edge_dark, px, py, "N", conn_w)
-            else:
-                pygame.draw.rect(screen, path_edge_light, (px + ts // 4, py, ts // 2, conn_w))
-            if not (mask & 2):
-                self._draw_edge_strip(screen, path_edge_dark, px, py, "E", conn_w)
-            else:
-                pygame.draw.rect(screen, path_edge_light, (px + ts - conn_w, py + ts // 4, conn_w, ts // 2))
-            if not (mask & 4):
-                self._draw_edge_strip(screen, path_edge_dark, px, py, "S", conn_w)
-            else:
-                pygame.draw.rect(screen, path_edge_light, (px + ts // 4, py + ts - conn_w, ts // 2, conn_w))
-            if not (mask & 8):
-                self._draw_edge_strip(screen, path_edge_dark, px, py, "W", conn_w)
-            else:
-                pygame.draw.rect(screen, path_edge_light, (px, py + ts // 4, conn_w, ts // 2))
-
-        # Pass 4: shoreline highlights on adjacent land tiles.
-        for y in range(self.mh):
-            for x in range(self.mw):
-                if (x, y) in self.water_tiles:
-                    continue
-                px, py = x * ts, y * ts
-                if (x, y - 1) in self.water_tiles:
-                    self._draw_edge_strip(screen, shore_light, px, py, "N", 2)
-                if (x + 1, y) in self.water_tiles:
-                    self._draw_edge_strip(screen, shore_light, px, py, "E", 2)
-                if (x, y + 1) in self.water_tiles:
-                    self._draw_edge_strip(screen, shore_light, px, py, "S", 2)
-                if (x - 1, y) in self.water_tiles:
-                    self._draw_edge_strip(screen, shore_light, px, py, "W", 2)
+        for (x, y) in self.path_tiles & self.water_tiles:
+            self._draw_path_tile(screen, x, y)
 
         # Apply a single continuous texture layer so tiles read as connected terrain.
         if getattr(self, "ground_overlay", None) is not None:
@@ -2723,6 +3165,8 @@ class InteriorRenderer:
         self.floor, self.floor2, self.wall, self.wall2, self.shelf, self.accent = (
             self.THEMES.get(theme, self._DEFAULT_THEME)
         )
+        self._glow = None
+        self._labels = {}
 
     def draw(self, screen, t: float = 0.0):
         ts = self.ts
@@ -2785,7 +3229,7 @@ class InteriorRenderer:
             pygame.draw.rect(screen, self.shelf, (5 * ts, 3 * ts, 6 * ts, ts), border_radius=6)
             pygame.draw.rect(screen, (80, 56, 38), (5 * ts + 8, 3 * ts + 8, 6 * ts - 16, ts - 14), border_radius=6)
             pygame.draw.rect(screen, (120, 84, 56), (self.mw // 2 * ts - 40, ts + 12, 80, 18), border_radius=4)
-            txt = self._small_font().render("LODGING", True, (245, 228, 180))
+            txt = self._label("LODGING", (245, 228, 180))
             screen.blit(txt, (self.mw // 2 * ts - 32, ts + 15))
             # Hallway doors attached to upper wall.
             door_y = ts
@@ -2793,7 +3237,7 @@ class InteriorRenderer:
             for idx, dx in enumerate(hall_xs, start=2):
                 pygame.draw.rect(screen, (104, 70, 48), (dx, door_y, ts - 10, int(ts * 1.1)), border_radius=6)
                 pygame.draw.rect(screen, (74, 48, 34), (dx, door_y, ts - 12, int(ts * 1.2)), 2, border_radius=6)
-                num = self._small_font().render(str(idx), True, (240, 230, 200))
+                num = self._label(str(idx), (240, 230, 200))
                 screen.blit(num, (dx + (ts // 2) - 8, door_y + 4))
 
             # Lounge rugs and tables.
@@ -2843,12 +3287,15 @@ class InteriorRenderer:
             # Room exit door
             pygame.draw.rect(screen, (108, 74, 50), (self.mw // 2 * ts - 16, (self.mh - 1) * ts + 8, 32, ts - 14), border_radius=6)
 
-        # Warm light pool
-        glow = pygame.Surface((self.mw * ts, self.mh * ts), pygame.SRCALPHA)
-        cx, cy = (self.mw * ts) // 2, (self.mh * ts) // 2
-        for r in range(220, 20, -20):
-            a = int(20 * (r / 220))
-            pygame.draw.circle(glow, (*self.accent, a), (cx, cy), r)
+        # Warm light pool (same every frame, so built once)
+        glow = self._glow
+        if glow is None:
+            glow = pygame.Surface((self.mw * ts, self.mh * ts), pygame.SRCALPHA)
+            cx, cy = (self.mw * ts) // 2, (self.mh * ts) // 2
+            for r in range(220, 20, -20):
+                a = int(20 * (r / 220))
+                pygame.draw.circle(glow, (*self.accent, a), (cx, cy), r)
+            glow = self._glow = glow.convert_alpha()
         screen.blit(glow, (0, 0))
 
     def get_solid_tiles(self) -> set:
@@ -2899,12 +3346,51 @@ class InteriorRenderer:
     def _small_font(self):
         return pygame.font.Font(None, 20)
 
+    def _label(self, text: str, color) -> pygame.Surface:
+        """Small-font text surface, cached per (string, color); building the font is the slow part."""
+        key = (text, color)
+        surf = self._labels.get(key)
+        if surf is None:
+            surf = self._labels[key] = self._small_font().render(text, True, color)
+        return surf
+
 
 # ============================================================
 # GAME ENGINE
 # ============================================================
 
+# UI colors shared by the HUD, quest log and message box.
+_COL_TITLE = (255, 215, 0)
+_COL_LEVEL = (180, 180, 200)
+_COL_PANEL_BG = (25, 25, 40)
+_COL_PANEL_EDGE = (60, 60, 90)
+_COL_BAR_BG = (50, 50, 70)
+_COL_BAR_FILL = (100, 200, 100)
+_COL_WHITE = (255, 255, 255)
+_COL_PROGRESS = (150, 200, 255)
+_COL_INVENTORY = (255, 200, 100)
+_COL_INVENTORY_ITEM = (150, 255, 150)
+_COL_MUTED = (100, 100, 120)
+_COL_GOLD = (255, 230, 120)
+_COL_SHOP_NAME = (150, 255, 220)
+_COL_ACCENT = (200, 200, 255)
+_COL_TEXT = (220, 220, 220)
+_COL_TEXT_DIM = (200, 200, 200)
+_COL_QUEST = (255, 150, 150)
+_COL_CONTROLS = (100, 180, 255)
+_COL_CONTROLS_TEXT = (120, 120, 150)
+_COL_QUEST_LOG_BG = (15, 15, 25, 210)
+_COL_QUEST_LOG_EDGE = (90, 90, 120)
+_COL_OVERLAY_SLEEP = (10, 10, 20, 140)
+_COL_SLEEP_TEXT = (230, 230, 255)
+_COL_MSG_BG = (20, 20, 35)
+_COL_MSG_EDGE = (100, 100, 140)
+_COL_MSG_SPEAKER = (255, 230, 170)
+
+
 class GameEngine:
+    CONTROL_LINES = ("WASD - Move", "SPACE - Interact", "1-3 - Buy (Indoor)", "N/ENTER - Next Level", "R - Restart", "ESC - Quit")
+
     def __init__(self, levels: list, config: Config):
         self.levels = levels
         self.level_index = 0
@@ -2922,6 +3408,33 @@ class GameEngine:
         self.entity_phase = {}
         self.surfaces = {}
         self.sprite_offsets = {}
+        # Converted sprite surfaces by (id(PIL image), size) and by perceptual hash; self.levels keeps the images alive.
+        self._converted = {}
+        self._interned = {}
+        # Message box layout: (message, max_text_w, [rendered lines]) and box surfaces by size.
+        self._msg_cache = None
+        self._msg_box_cache = {}
+        # Translucent overlays are filled once and reused every frame.
+        self._sleep_overlay = None
+        self._panel_cache = {}
+        # Sprite atlas: every sprite packed into one surface, blitted by source rect.
+        self._atlas = None
+        self._atlas_rect = {}
+        self._blit_queue = []
+        self._sprite_src = {}
+        self._ts = config.TILE_SIZE
+        # Per-scene list of draw steps (see _build_scene_draw_plan).
+        self._scene_draw_plan = []
+        self._scene_draw_plan_key = None
+        # Last drawn frame state; draw() is skipped while it is unchanged.
+        self._last_state_key = None
+        self._offset_memo_t = None
+        self._offset_memo_map = {}
+        self._display_strs = {}
+        # (quest state key, quest log/panel strings) from _quest_ui.
+        self._quest_ui_cache = None
+        # Rendered text surfaces per (font, string, color).
+        self._text_cache = {}
 
         self.load_level(0)
 
@@ -2997,6 +3510,25 @@ class GameEngine:
                         opx[x, y] = (16, 20, 26, 140)
         return out
 
+    def _sprite_surface(self, img: Image.Image, size: int) -> pygame.Surface:
+        """Clean, scale and convert a sprite once per run; levels share their reused sprites' surfaces."""
+        source_key = (id(img), size)
+        surf = self._converted.get(source_key)
+        if surf is not None:
+            return surf
+        img = self._cleanup_sprite_rgba(img)
+        # Visually identical sprites at the same size share one surface (and one atlas slot).
+        key = (_sprite_phash(img), size)
+        surf = self._interned.get(key)
+        if surf is None:
+            surface = pygame.image.frombuffer(img.tobytes(), img.size, "RGBA")
+            surf = pygame.transform.scale(surface, (size, size)).convert_alpha()
+            # Final hard fallback for any lingering pure-green matte.
+            surf.set_colorkey((0, 255, 0))
+            self._interned[key] = surf
+        self._converted[source_key] = surf
+        return surf
+
     def load_level(self, index: int):
         self.level_index = index
         level = self.levels[index]
@@ -3017,14 +3549,14 @@ class GameEngine:
         self.sprite_offsets = {}
         ts = self.config.TILE_SIZE
         for name, img in sprites.items():
-            img = self._cleanup_sprite_rgba(img)
-            surface = pygame.image.fromstring(img.tobytes(), img.size, "RGBA")
             scale = 1.0
             base_name = name.replace("_alt", "")
             if base_name.startswith("scene_"):
                 # Full-room backdrop image (shop/inn scenes).
+                img = self._cleanup_sprite_rgba(img)
                 map_w = self.config.MAP_WIDTH * ts
                 map_h = self.config.MAP_HEIGHT * ts
+                surface = pygame.image.frombuffer(img.tobytes(), img.size, "RGBA")
                 surf = pygame.transform.scale(surface, (map_w, map_h)).convert_alpha()
                 self.surfaces[name] = surf
                 self.sprite_offsets[name] = (0, 0)
@@ -3044,13 +3576,12 @@ class GameEngine:
             elif base_name in ["inn_bed", "inn_room_door"]:
                 scale = 1.9
             size = max(1, int(ts * scale))
-            surf = pygame.transform.scale(surface, (size, size)).convert_alpha()
-            # Final hard fallback for any lingering pure-green matte.
-            surf.set_colorkey((0, 255, 0))
-            self.surfaces[name] = surf
+            self.surfaces[name] = self._sprite_surface(img, size)
             off_x = (ts - size) // 2
             off_y = ts - size
             self.sprite_offsets[name] = (off_x, off_y)
+        self._build_atlas()
+        self._text_cache.clear()
 
         self.anim_time = 0.0
         self.entity_phase = {}
@@ -3059,6 +3590,8 @@ class GameEngine:
     
     def reset_game(self):
         ts = self.config.TILE_SIZE
+        self._last_state_key = None
+        self._offset_memo_t = None
         quest = self.game.get("quest", {})
         self.quest = quest
         self.quest_types = _normalize_quest_types(
@@ -3173,6 +3706,9 @@ class GameEngine:
                 "items": [],
             },
         ]
+        for b in self.buildings:
+            b["guest_blits"] = self._guest_blits(b)
+            b["good_strs"] = [f"{i+1}. {g['name']} ({g['price']}g)" for i, g in enumerate((b.get("goods") or [])[:3])]
 
         # Ensure outdoor entrances are reachable from player spawn side.
         start_tile_hint = (
@@ -3186,6 +3722,16 @@ class GameEngine:
             ex, ey = self._pick_free_reachable((ex, ey), reachable_outdoor, occupied_entrances, self.solid_outdoor)
             b["entrance"] = (ex, ey)
             occupied_entrances.add((ex, ey))
+        # Pixel-space anchors for the per-frame building/room-door draws.
+        for b in self.buildings:
+            ex, ey = b["entrance"]
+            b["entrance_px"] = (ex * ts + ts // 2, ey * ts + ts // 2)
+            b["label"] = "SHOP" if b["theme"] == "shop" else "INN"
+            if "room_door" in b:
+                rdx, rdy = b["room_door"]
+                b["room_tag_rect"] = (rdx * ts + 18, rdy * ts - 10, 34, 14)
+                b["room_tag_pos"] = (rdx * ts + 22, rdy * ts - 10)
+                b["room_tag"] = f"R{b.get('room_number', '3')}"
 
         # Place repair bridge on an actual water crossing reachable from the player's side.
         if "repair_bridge" in self.quest_types:
@@ -3397,36 +3943,141 @@ class GameEngine:
             if entity:
                 place(entity, dx, dy)
 
+    def _build_atlas(self, max_w: int = 1024):
+        """Pack sprite surfaces into one atlas (simple shelf packing, tallest first)."""
+        self._atlas = None
+        self._atlas_rect = {}
+        self._blit_queue = []
+        self._index_sprites()
+        names = [n for n in self.surfaces if not n.replace("_alt", "").startswith("scene_")]
+        if not names:
+            return
+        names.sort(key=lambda n: self.surfaces[n].get_height(), reverse=True)
+        slots = {}
+        packed = {}
+        x = y = shelf_h = atlas_w = 0
+        for name in names:
+            # Interned sprites share a surface; pack it once.
+            if id(self.surfaces[name]) in packed:
+                slots[name] = packed[id(self.surfaces[name])]
+                continue
+            w, h = self.surfaces[name].get_size()
+            if x and x + w > max_w:
+                x = 0
+                y += shelf_h
+                shelf_h = 0
+            slots[name] = packed[id(self.surfaces[name])] = pygame.Rect(x, y, w, h)
+            x += w
+            shelf_h = max(shelf_h, h)
+            atlas_w = max(atlas_w, x)
+        try:
+            atlas = pygame.Surface((atlas_w, y + shelf_h), pygame.SRCALPHA).convert_alpha()
+            atlas.fill((0, 0, 0, 0))
+            for name, rect in slots.items():
+                # RGBA_MAX onto a cleared surface copies pixels without re-blending alpha.
+                atlas.blit(self.surfaces[name], rect.topleft, special_flags=pygame.BLEND_RGBA_MAX)
+            atlas.set_colorkey((0, 255, 0))
+        except Exception:
+            return
+        self._atlas = atlas
+        self._atlas_rect = slots
+        self._index_sprites()
+
+    def _index_sprites(self):
+        """Resolve each sprite once to (source surface, area, offset_x, offset_y) for the blit helpers."""
+        self._sprite_src = {}
+        for name, surf in self.surfaces.items():
+            ox, oy = self.sprite_offsets.get(name, (0, 0))
+            rect = self._atlas_rect.get(name)
+            self._sprite_src[name] = (self._atlas, rect, ox, oy) if rect is not None else (surf, None, ox, oy)
+
+    def _text(self, font, text: str, color):
+        """Rendered text surface, cached per (font, string, color)."""
+        key = (id(font), text, color)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            surf = font.render(text, True, color)
+            self._text_cache[key] = surf
+        return surf
+
+    def _guest_blits(self, building: dict) -> list:
+        """Prebuilt blit tuples for a building's (static) lobby guests."""
+        key = building.get("npc_sprite_key", "npc")
+        if key not in self.surfaces:
+            key = "npc"
+        ts = self.config.TILE_SIZE
+        out = []
+        for i, (gx, gy) in enumerate(building.get("guest_npcs", []), start=1):
+            gkey = "npc" if i % 2 == 0 else key
+            if gkey not in self.surfaces:
+                gkey = key
+            surf = self.surfaces.get(gkey)
+            if not surf:
+                continue
+            ox, oy = self.sprite_offsets.get(gkey, (0, 0))
+            dest = (gx * ts + ox, gy * ts + oy)
+            rect = self._atlas_rect.get(gkey)
+            out.append((self._atlas, dest, rect) if rect is not None else (surf, dest))
+        return out
+
+    def _flush_sprites(self):
+        if self._blit_queue:
+            self.screen.blits(self._blit_queue, doreturn=False)
+            self._blit_queue.clear()
+
+    def _offset_memo(self) -> dict:
+        """Per-frame memo for bob/float offsets (state key and draw both ask for them)."""
+        if self._offset_memo_t != self.anim_time:
+            self._offset_memo_t = self.anim_time
+            self._offset_memo_map.clear()
+        return self._offset_memo_map
+
     def _entity_bob(self, key: str, moving: bool = False):
+        memo = self._offset_memo()
+        hit = memo.get((key, moving))
+        if hit is not None:
+            return hit
         phase = self.entity_phase.get(key, 0.0)
         speed = 6 if moving else 3
         amp = self.config.WALK_BOB if moving else self.config.IDLE_BOB
-        y = int(math.sin(self.anim_time * speed + phase) * amp)
-        x = int(math.sin(self.anim_time * speed * 0.7 + phase) * 1)
+        t = self.anim_time * speed
+        y = int(math.sin(t + phase) * amp) if amp else 0
+        x = int(math.sin(t * 0.7 + phase) * 1)
+        memo[(key, moving)] = (x, y)
         return x, y
 
     def _float_offset(self, key: str):
+        memo = self._offset_memo()
+        hit = memo.get(key)
+        if hit is not None:
+            return hit
         phase = self.entity_phase.get(key, 0.0)
         y = int(math.sin(self.anim_time * 2 + phase) * 3) - 2
+        memo[key] = (0, y)
         return 0, y
 
     def _blit_sprite(self, key: str, tile_x: int, tile_y: int, extra=(0, 0)):
-        surf = self.surfaces.get(key)
-        if not surf:
+        src = self._sprite_src.get(key)
+        if src is None:
             return
-        ox, oy = self.sprite_offsets.get(key, (0, 0))
-        ex, ey = extra
-        px = tile_x * self.config.TILE_SIZE + ox + ex
-        py = tile_y * self.config.TILE_SIZE + oy + ey
-        self.screen.blit(surf, (px, py))
+        surf, area, ox, oy = src
+        ts = self._ts
+        dest = (tile_x * ts + ox + extra[0], tile_y * ts + oy + extra[1])
+        if area is not None:
+            self._blit_queue.append((surf, dest, area))
+        else:
+            self.screen.blit(surf, dest)
 
     def _blit_sprite_px(self, key: str, px: int, py: int, extra=(0, 0)):
-        surf = self.surfaces.get(key)
-        if not surf:
+        src = self._sprite_src.get(key)
+        if src is None:
             return
-        ox, oy = self.sprite_offsets.get(key, (0, 0))
-        ex, ey = extra
-        self.screen.blit(surf, (px + ox + ex, py + oy + ey))
+        surf, area, ox, oy = src
+        dest = (px + ox + extra[0], py + oy + extra[1])
+        if area is not None:
+            self._blit_queue.append((surf, dest, area))
+        else:
+            self.screen.blit(surf, dest)
 
     def _draw_building_exterior(self, center_x: int, center_y: int, theme: str, label: str):
         """Draw a consistent retro RPG-style building exterior."""
@@ -3486,8 +4137,7 @@ class GameEngine:
 
         # Sign plaque.
         pygame.draw.rect(self.screen, sign_bg, (x0 + 14, y0 + ts + 8, 50, 16), border_radius=4)
-        txt = self.font.render(label, True, (238, 236, 226))
-        self.screen.blit(txt, (x0 + 18, y0 + ts + 8))
+        self.screen.blit(self._text(self.font, label, (238, 236, 226)), (x0 + 18, y0 + ts + 8))
 
     def _indoor_scene_key(self):
         # Scene backdrops are disabled in favor of deterministic in-engine interiors.
@@ -3537,6 +4187,25 @@ class GameEngine:
         lines.append(cur)
         return lines
 
+    def _message_lines(self, max_text_w: int):
+        """Wrapped + rendered message lines, rebuilt only when the message changes."""
+        cached = self._msg_cache
+        if cached and cached[0] == self.message and cached[1] == max_text_w:
+            return cached[2]
+        lines = []
+        for raw in self.message.split("\n"):
+            if raw.strip() == "":
+                continue
+            lines.extend(self._wrap_text_px(raw, max_text_w))
+        rendered = []
+        for i, line in enumerate(lines[:4]):
+            color = _COL_WHITE
+            if i == 0 and ":" in line[:22]:
+                color = _COL_MSG_SPEAKER
+            rendered.append(self.font.render(line, True, color))
+        self._msg_cache = (self.message, max_text_w, rendered)
+        return rendered
+
     def _quest_progress(self):
         steps = self._quest_step_states()
         done = sum(1 for _, ok in steps if ok)
@@ -3613,6 +4282,30 @@ class GameEngine:
             return f"Quest: {goal}. Steps: {short_steps}. Next: {next_step}."
         return f"Quest: {goal}. Next: {next_step}."
 
+    def _quest_ui(self) -> dict:
+        """Pre-truncated quest log / panel strings, rebuilt only when step state changes."""
+        known = getattr(self, "quest_known", True)
+        goal = self.quest.get("goal", "Complete the quest") if hasattr(self, "quest") else "Complete the quest"
+        states = tuple(self._quest_step_states())
+        key = (known, goal, states)
+        cached = self._quest_ui_cache
+        if cached and cached[0] == key:
+            return cached[1]
+        if not known:
+            log = ["Talk to the NPC to learn your quest."]
+        else:
+            log = [f"Goal: {goal}"]
+            log.extend(("✓ " if done else "→ ") + label for label, done in states[:4])
+            next_label = next((label for label, done in states if not done), "Quest complete")
+            log.append("Next: " + next_label)
+        ui = {
+            "log": [line[:40] for line in log],
+            "goal": goal[:26],
+            "steps": [(("✓ " if done else "→ ") + label)[:28] for label, done in states[:4]],
+        }
+        self._quest_ui_cache = (key, ui)
+        return ui
+
     def _next_step_label(self):
         for label, done in self._quest_step_states():
             if not done:
@@ -3666,7 +4359,11 @@ class GameEngine:
             if not getattr(self, "sleeping", False):
                 dx = (keys[pygame.K_RIGHT] or keys[pygame.K_d]) - (keys[pygame.K_LEFT] or keys[pygame.K_a])
                 dy = (keys[pygame.K_DOWN] or keys[pygame.K_s]) - (keys[pygame.K_UP] or keys[pygame.K_w])
-                self.move(dx * self.config.PLAYER_SPEED, dy * self.config.PLAYER_SPEED)
+                if dx or dy:
+                    self.move(dx * self.config.PLAYER_SPEED, dy * self.config.PLAYER_SPEED)
+                else:
+                    # Idle: nothing to bounds-check or collide.
+                    self.is_moving = False
                 if not self.game_won:
                     self.check_pickups()
             else:
@@ -4100,162 +4797,227 @@ class GameEngine:
         self.dialogue_state[key] = idx + 1
         return lines[idx]
     
-    def draw(self):
-        ts = self.config.TILE_SIZE
-        map_w = self.config.MAP_WIDTH * ts
-        map_h = self.config.MAP_HEIGHT * ts
-        
-        # Draw terrain
+    def _frame_state_key(self):
+        """Everything the next frame depends on; equal keys mean an identical screen."""
+        floats = [self._float_offset(it["id"])[1] for it in self.items]
+        if self.scene == "indoor" and self.current_building:
+            floats.extend(self._float_offset(g["id"])[1] for g in self.current_building.get("goods", [])[:3])
+        if self.key_spawned:
+            floats.append(self._float_offset("key")[1])
+        return (
+            self.level_index,
+            self.scene,
+            getattr(self, "indoor_mode", "lobby"),
+            id(self.current_building),
+            id(self.terrain),
+            id(self.interior),
+            self.terrain.anim_key(self.anim_time) if self.scene == "outdoor" else None,
+            self.player_x,
+            self.player_y,
+            self._entity_bob("player", moving=getattr(self, "is_moving", False)),
+            self._entity_bob("npc"),
+            tuple(floats),
+            frozenset(self.items_collected),
+            tuple(self._quest_step_states()),
+            getattr(self, "quest_known", True),
+            tuple(self.inventory),
+            getattr(self, "money", 0),
+            self.message if self.message_timer > 0 else None,
+            getattr(self, "sleeping", False),
+            # Included so the frame after the last particle dies is still redrawn.
+            self.effects.is_idle(),
+        )
+
+    def _scene_plan_key(self):
+        b = self.current_building
+        return (
+            self.scene,
+            id(b),
+            getattr(self, "indoor_mode", "lobby"),
+            tuple(self.quest_types),
+        )
+
+    def _build_scene_draw_plan(self) -> list:
+        """Ordered draw steps for the current scene; rebuilt only on scene/mode transitions."""
+        plan = []
         if self.scene == "outdoor":
-            self.terrain.draw(self.screen, self.anim_time)
+            plan.append(self._draw_outdoor_terrain)
+            plan.append(self._draw_bridge)
+            plan.append(self._draw_outdoor_items)
+            if "key_and_door" in self.quest_types:
+                plan.extend([self._draw_key, self._draw_chest, self._draw_door])
+            if "cure" in self.quest_types:
+                plan.append(self._draw_mix_station)
+            plan.append(self._draw_building_markers)
+            plan.append(self._draw_outdoor_npc)
         else:
-            scene_key = self._indoor_scene_key()
-            if scene_key and scene_key in self.surfaces:
-                self.screen.blit(self.surfaces[scene_key], (0, 0))
+            plan.append(self._draw_interior)
+            b = self.current_building
+            if b:
+                theme = b.get("theme")
+                in_room = theme == "inn" and getattr(self, "indoor_mode", "lobby") == "room"
+                if theme == "shop":
+                    plan.append(self._draw_shop_goods)
+                if not in_room:
+                    # Private room mode: no host/guest NPCs inside the bedroom.
+                    plan.append(self._draw_indoor_host)
+                if theme == "inn" and not in_room:
+                    plan.append(self._draw_inn_guests)
+        plan.append(self._draw_player)
+        return plan
+
+    def _draw_outdoor_terrain(self):
+        self.terrain.draw(self.screen, self.anim_time)
+
+    def _draw_interior(self):
+        scene_key = self._indoor_scene_key()
+        if scene_key and scene_key in self.surfaces:
+            self.screen.blit(self.surfaces[scene_key], (0, 0))
+        else:
+            self.interior.draw(self.screen, self.anim_time)
+        self._draw_indoor_setpieces()
+
+    def _draw_bridge(self):
+        if not self.bridge_tiles:
+            return
+        ts = self.config.TILE_SIZE
+        # Bridge is vertical (two tiles). Draw as a continuous structure.
+        tiles = sorted(list(self.bridge_tiles), key=lambda t: (t[1], t[0]))
+        for idx, (bx, by) in enumerate(tiles):
+            x = bx * ts
+            y = by * ts
+            mid = y + ts // 2
+
+            if self.bridge_repaired:
+                # Fixed bridge: wooden planks + side ropes
+                pygame.draw.rect(self.screen, (150, 110, 75), (x, mid - 12, ts, 24))
+                for px in range(x + 10, x + ts - 10, 12):
+                    pygame.draw.line(self.screen, (120, 85, 55), (px, mid - 10), (px, mid + 10), 2)
+                # Side ropes
+                pygame.draw.line(self.screen, (210, 190, 140), (x + 6, mid - 14), (x + ts - 6, mid - 14), 2)
+                pygame.draw.line(self.screen, (210, 190, 140), (x + 6, mid + 14), (x + ts - 6, mid + 14), 2)
             else:
-                self.interior.draw(self.screen, self.anim_time)
-            self._draw_indoor_setpieces()
-
-        # Draw broken/repaired bridge (outdoor)
-        if self.scene == "outdoor" and self.bridge_tiles:
-            ts = self.config.TILE_SIZE
-            # Bridge is vertical (two tiles). Draw as a continuous structure.
-            tiles = sorted(list(self.bridge_tiles), key=lambda t: (t[1], t[0]))
-            for idx, (bx, by) in enumerate(tiles):
-                x = bx * ts
-                y = by * ts
-                mid = y + ts // 2
-
-                if self.bridge_repaired:
-                    # Fixed bridge: wooden planks + side ropes
-                    pygame.draw.rect(self.screen, (150, 110, 75), (x, mid - 12, ts, 24))
-                    for px in range(x + 10, x + ts - 10, 12):
-                        pygame.draw.line(self.screen, (120, 85, 55), (px, mid - 10), (px, mid + 10), 2)
-                    # Side ropes
-                    pygame.draw.line(self.screen, (210, 190, 140), (x + 6, mid - 14), (x + ts - 6, mid - 14), 2)
-                    pygame.draw.line(self.screen, (210, 190, 140), (x + 6, mid + 14), (x + ts - 6, mid + 14), 2)
-                else:
-                    # Broken bridge: partial boards with a gap + rubble
-                    pygame.draw.rect(self.screen, (95, 75, 60), (x, mid - 12, ts, 24))
-                    # Missing center boards
-                    pygame.draw.rect(self.screen, (35, 35, 45), (x + ts // 2 - 16, mid - 10, 32, 20), border_radius=4)
-                    # Broken planks
-                    pygame.draw.line(self.screen, (120, 85, 55), (x + 8, mid - 10), (x + ts // 2 - 18, mid - 10), 3)
-                    pygame.draw.line(self.screen, (120, 85, 55), (x + ts // 2 + 18, mid + 10), (x + ts - 8, mid + 10), 3)
-                    # Nails / debris specks
-                    pygame.draw.circle(self.screen, (40, 40, 50), (x + ts // 2 - 6, mid + 4), 2)
-                    pygame.draw.circle(self.screen, (40, 40, 50), (x + ts // 2 + 8, mid - 2), 2)
-        
-        # Draw items (outdoor pickups)
+                # Broken bridge: partial boards with a gap + rubble
+                pygame.draw.rect(self.screen, (95, 75, 60), (x, mid - 12, ts, 24))
+                # Missing center boards
+                pygame.draw.rect(self.screen, (35, 35, 45), (x + ts // 2 - 16, mid - 10, 32, 20), border_radius=4)
+                # Broken planks
+                pygame.draw.line(self.screen, (120, 85, 55), (x + 8, mid - 10), (x + ts // 2 - 18, mid - 10), 3)
+                pygame.draw.line(self.screen, (120, 85, 55), (x + ts // 2 + 18, mid + 10), (x + ts - 8, mid + 10), 3)
+                # Nails / debris specks
+                pygame.draw.circle(self.screen, (40, 40, 50), (x + ts // 2 - 6, mid + 4), 2)
+                pygame.draw.circle(self.screen, (40, 40, 50), (x + ts // 2 + 8, mid - 2), 2)
+
+    def _draw_outdoor_items(self):
         for i, item in enumerate(self.items):
             if item["id"] in self.items_collected:
                 continue
             sprite_key = "item" if i == 0 else "item2" if i == 1 else "item"
             ox, oy = self._float_offset(item["id"])
-            if self.scene == "outdoor":
-                self._blit_sprite(sprite_key, item["x"], item["y"], (ox, oy))
+            self._blit_sprite(sprite_key, item["x"], item["y"], (ox, oy))
 
-        # Indoor shop displays (visual only; buying happens via keys)
-        if self.scene == "indoor" and self.current_building:
-            goods = self.current_building.get("goods", [])
-            # Draw 2-3 goods as floating icons near the shelves
-            for gi, g in enumerate(goods[:3]):
-                theme = self.current_building.get("theme")
-                if theme == "shop":
-                    # Put items on the back shelves (not the middle of the floor).
-                    shelf_spots = [(3, 2), (7, 2), (11, 2), (4, 4), (10, 4)]
-                    gx, gy = shelf_spots[gi % len(shelf_spots)]
-                else:
-                    # Avoid drawing random item icons in inn/other interiors.
-                    continue
-                ox, oy = self._float_offset(g["id"])
-                sprite = "item"
-                if g["id"] == "planks" and "mat_planks" in self.surfaces:
-                    sprite = "mat_planks"
-                elif g["id"] == "rope" and "mat_rope" in self.surfaces:
-                    sprite = "mat_rope"
-                elif g["id"] == "nails" and "mat_nails" in self.surfaces:
-                    sprite = "mat_nails"
-                self._blit_sprite(sprite, gx, gy, (ox, oy))
-
-        # Draw key (key_and_door goal)
-        if ("key_and_door" in self.quest_types) and self.key_spawned and not self.key_collected and self.key_pos:
+    def _draw_shop_goods(self):
+        """Shop displays (visual only; buying happens via keys)."""
+        goods = self.current_building.get("goods", [])
+        # Put 2-3 goods on the back shelves (not the middle of the floor).
+        shelf_spots = [(3, 2), (7, 2), (11, 2), (4, 4), (10, 4)]
+        for gi, g in enumerate(goods[:3]):
+            gx, gy = shelf_spots[gi % len(shelf_spots)]
+            ox, oy = self._float_offset(g["id"])
+            sprite = "item"
+            if g["id"] == "planks" and "mat_planks" in self.surfaces:
+                sprite = "mat_planks"
+            elif g["id"] == "rope" and "mat_rope" in self.surfaces:
+                sprite = "mat_rope"
+            elif g["id"] == "nails" and "mat_nails" in self.surfaces:
+                sprite = "mat_nails"
+            self._blit_sprite(sprite, gx, gy, (ox, oy))
+
+    def _draw_key(self):
+        if self.key_spawned and not self.key_collected and self.key_pos:
             ox, oy = self._float_offset("key")
             self._blit_sprite("key", self.key_pos[0], self.key_pos[1], (ox, oy))
-        
-        # Draw chest
-        if ("key_and_door" in self.quest_types) and self.chest and not self.chest_opened:
+
+    def _draw_chest(self):
+        if self.chest and not self.chest_opened:
             self._blit_sprite("chest", self.chest["x"], self.chest["y"])
 
-        # Draw door
-        if ("key_and_door" in self.quest_types) and self.door and not self.door_opened:
+    def _draw_door(self):
+        if self.door and not self.door_opened:
             self._blit_sprite("door", self.door["x"], self.door["y"])
 
-        # Draw mix station
-        if ("cure" in self.quest_types) and self.mix_station:
+    def _draw_mix_station(self):
+        if self.mix_station:
             self._blit_sprite("mix_station", self.mix_station["x"], self.mix_station["y"])
 
-        # Draw building entrance markers (outdoor)
-        if self.scene == "outdoor":
-            for i, b in enumerate(self.buildings):
-                ex, ey = b["entrance"]
-                cx = ex * ts + ts // 2
-                cy = ey * ts + ts // 2
-                label = "SHOP" if b["theme"] == "shop" else "INN"
-                self._draw_building_exterior(cx, cy, b["theme"], label)
-        
-        # Draw NPC
+    def _draw_building_markers(self):
+        self._flush_sprites()
+        for b in self.buildings:
+            cx, cy = b["entrance_px"]
+            self._draw_building_exterior(cx, cy, b["theme"], b["label"])
+
+    def _draw_outdoor_npc(self):
         npc = self.game["npc"]
         if ("cure" in self.quest_types) and (not self.npc_healed) and self.surfaces.get("npc_sick"):
             npc_base = "npc_sick"
         else:
             npc_base = "npc_healed" if self.npc_healed and self.surfaces.get("npc_healed") else "npc"
         ox, oy = self._entity_bob("npc")
-        if self.scene == "outdoor":
-            self._blit_sprite(npc_base, npc["x"], npc["y"], (ox, oy))
-        else:
-            # Indoor NPC uses per-building unique sprite (generated at level creation).
-            if self.current_building:
-                if self.current_building.get("theme") == "inn" and getattr(self, "indoor_mode", "lobby") == "room":
-                    # Private room mode: no host/guest NPCs inside the bedroom.
-                    nx, ny = None, None
-                else:
-                    nx, ny = self.current_building["npc_pos"]
-                if nx is not None:
-                    key = self.current_building.get("npc_sprite_key", "npc")
-                    if key not in self.surfaces:
-                        key = "npc"
-                    self._blit_sprite(key, nx, ny, (0, 0))
-                # Inn lobby extra NPCs for life.
-                if self.current_building.get("theme") == "inn" and getattr(self, "indoor_mode", "lobby") == "lobby":
-                    for i, (gx, gy) in enumerate(self.current_building.get("guest_npcs", []), start=1):
-                        gkey = "npc" if i % 2 == 0 else key
-                        if gkey not in self.surfaces:
-                            gkey = key
-                        self._blit_sprite(gkey, gx, gy, (0, 0))
-                    # Room door marker in lobby.
-                    rdx, rdy = self.current_building.get("room_door", (self.config.MAP_WIDTH // 2, 5))
-                    tag = pygame.draw.rect(self.screen, (75, 55, 40), (rdx * ts + 18, rdy * ts - 10, 34, 14), border_radius=3)
-                    txt = self.font.render(f"R{self.current_building.get('room_number', '3')}", True, (235, 225, 200))
-                    self.screen.blit(txt, (rdx * ts + 22, rdy * ts - 10))
-        
-        # Draw player
+        self._blit_sprite(npc_base, npc["x"], npc["y"], (ox, oy))
+
+    def _draw_indoor_host(self):
+        # Indoor NPC uses per-building unique sprite (generated at level creation).
+        nx, ny = self.current_building["npc_pos"]
+        key = self.current_building.get("npc_sprite_key", "npc")
+        if key not in self.surfaces:
+            key = "npc"
+        self._blit_sprite(key, nx, ny, (0, 0))
+
+    def _draw_inn_guests(self):
+        # Inn lobby extra NPCs for life.
+        b = self.current_building
+        self._blit_queue.extend(b.get("guest_blits", ()))
+        # Room door marker in lobby.
+        self._flush_sprites()
+        pygame.draw.rect(self.screen, (75, 55, 40), b["room_tag_rect"], border_radius=3)
+        self.screen.blit(self._text(self.font, b["room_tag"], (235, 225, 200)), b["room_tag_pos"])
+
+    def _draw_player(self):
         moving = getattr(self, "is_moving", False)
         ox, oy = self._entity_bob("player", moving=moving)
         self._blit_sprite_px("player", self.player_x, self.player_y, (ox, oy))
+
+    def draw(self):
+        ts = self.config.TILE_SIZE
+        map_w = self.config.MAP_WIDTH * ts
+        map_h = self.config.MAP_HEIGHT * ts
+
+        # Idle player on a still screen: nothing to redraw.
+        state_key = self._frame_state_key()
+        if state_key == self._last_state_key and state_key[-1]:
+            return
+        self._last_state_key = state_key
+        
+        if self._scene_draw_plan_key != self._scene_plan_key():
+            self._scene_draw_plan_key = self._scene_plan_key()
+            self._scene_draw_plan = self._build_scene_draw_plan()
+        for step in self._scene_draw_plan:
+            step()
+        self._flush_sprites()
         
         # Effects
         self.effects.draw(self.screen)
 
         # Sleeping overlay (inn)
         if getattr(self, "sleeping", False):
-            overlay = pygame.Surface((map_w, map_h), pygame.SRCALPHA)
-            overlay.fill((10, 10, 20, 140))
-            self.screen.blit(overlay, (0, 0))
+            if self._sleep_overlay is None or self._sleep_overlay.get_size() != (map_w, map_h):
+                self._sleep_overlay = pygame.Surface((map_w, map_h), pygame.SRCALPHA).convert_alpha()
+                self._sleep_overlay.fill(_COL_OVERLAY_SLEEP)
+            self.screen.blit(self._sleep_overlay, (0, 0))
             # Floating Zzz above the player
-            z = self.font_title.render("Z z z", True, (230, 230, 255))
+            z = self._text(self.font_title, "Z z z", _COL_SLEEP_TEXT)
             self.screen.blit(z, (int(self.player_x + ts * 0.2), int(self.player_y - ts * 0.6)))
-            sub = self.font.render("Sleeping... (SPACE to wake)", True, (230, 230, 255))
+            sub = self._text(self.font, "Sleeping... (SPACE to wake)", _COL_SLEEP_TEXT)
             self.screen.blit(sub, (12, map_h - 30))
 
         # Quest log (pinned)
@@ -4269,28 +5031,21 @@ class GameEngine:
             padding_x = 22
             max_text_w = (map_w - 24) - (padding_x * 2)
 
-            raw_lines = self.message.split("\n")
-            lines = []
-            for raw in raw_lines:
-                if raw.strip() == "":
-                    continue
-                lines.extend(self._wrap_text_px(raw, max_text_w))
-            lines = lines[:4]
+            lines = self._message_lines(max_text_w)
             box_h = 36 + 22 * len(lines)
             box_y = map_h - box_h - 12
             box_w = map_w - 24
             
-            s = pygame.Surface((box_w, box_h))
-            s.fill((20, 20, 35))
-            s.set_alpha(235)
+            s = self._msg_box_cache.get((box_w, box_h))
+            if s is None:
+                s = pygame.Surface((box_w, box_h))
+                s.fill(_COL_MSG_BG)
+                s.set_alpha(235)
+                self._msg_box_cache[(box_w, box_h)] = s
             self.screen.blit(s, (12, box_y))
-            pygame.draw.rect(self.screen, (100, 100, 140), (12, box_y, box_w, box_h), 3, border_radius=5)
+            pygame.draw.rect(self.screen, _COL_MSG_EDGE, (12, box_y, box_w, box_h), 3, border_radius=5)
             
-            for i, line in enumerate(lines):
-                color = (255, 255, 255)
-                if i == 0 and ":" in line[:22]:
-                    color = (255, 230, 170)
-                text = self.font.render(line, True, color)
+            for i, text in enumerate(lines):
                 self.screen.blit(text, (padding_x, box_y + 10 + i * 22))
         
         pygame.display.flip()
@@ -4299,78 +5054,127 @@ class GameEngine:
         x = 12
         y = 12
         w = min(360, map_w - 24)
-        lines = []
-        if not getattr(self, "quest_known", True):
-            lines.append("Talk to the NPC to learn your quest.")
-        else:
-            goal = self.quest.get("goal", "Complete the quest") if hasattr(self, "quest") else "Complete the quest"
-            lines.append(f"Goal: {goal}")
-            for label, done in self._quest_step_states()[:4]:
-                lines.append(("✓ " if done else "→ ") + label)
-            lines.append("Next: " + self._next_step_label())
+        lines = self._quest_ui()["log"]
         h = 28 + 18 * len(lines) + 12
 
-        panel = pygame.Surface((w, h), pygame.SRCALPHA)
-        panel.fill((15, 15, 25, 210))
+        panel = self._panel_cache.get((w, h))
+        if panel is None:
+            panel = pygame.Surface((w, h), pygame.SRCALPHA).convert_alpha()
+            panel.fill(_COL_QUEST_LOG_BG)
+            self._panel_cache[(w, h)] = panel
         self.screen.blit(panel, (x, y))
-        pygame.draw.rect(self.screen, (90, 90, 120), (x, y, w, h), 2, border_radius=4)
+        pygame.draw.rect(self.screen, _COL_QUEST_LOG_EDGE, (x, y, w, h), 2, border_radius=4)
 
-        self.screen.blit(self.font_large.render("QUEST LOG", True, (200, 200, 255)), (x + 10, y + 6))
+        self.screen.blit(self._text(self.font_large, "QUEST LOG", _COL_ACCENT), (x + 10, y + 6))
         ty = y + 30
         for line in lines:
-            self.screen.blit(self.font.render(line[:40], True, (220, 220, 220)), (x + 10, ty))
+            self.screen.blit(self._text(self.font, line, _COL_TEXT), (x + 10, ty))
             ty += 18
     
+    def _display_str(self, slot: str, values: tuple, fmt: str) -> str:
+        """Formatted HUD string, re-formatted only when its values change."""
+        cached = self._display_strs.get(slot)
+        if cached is not None and cached[0] == values:
+            return cached[1]
+        text = fmt.format(*values)
+        self._display_strs[slot] = (values, text)
+        return text
+
+    def _inventory_strs(self) -> list[str]:
+        # Keyed on the shown entries themselves, so any kind of inventory change refreshes them.
+        key = tuple(self.inventory[:5])
+        cached = self._display_strs.get("inventory")
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        lines = [f"✓ {name[:14]}" for name in key]
+        self._display_strs["inventory"] = (key, lines)
+        return lines
+
+    def _ui_panel_surface(self, panel_w: int):
+        """Side panel background + separator, baked once per width (1px left margin for the 3px edge)."""
+        key = ("ui_panel", panel_w)
+        surf = self._panel_cache.get(key)
+        if surf is None:
+            h = self.config.GAME_HEIGHT
+            surf = pygame.Surface((panel_w + 1, h)).convert()
+            surf.fill(_COL_PANEL_BG)
+            pygame.draw.line(surf, _COL_PANEL_EDGE, (1, 0), (1, h), 3)
+            self._panel_cache[key] = surf
+        return surf
+
+    def _progress_bar_bg(self, bar_w: int):
+        key = ("progress_bg", bar_w)
+        surf = self._panel_cache.get(key)
+        if surf is None:
+            surf = pygame.Surface((bar_w, 20)).convert()
+            surf.fill(_COL_PANEL_BG)
+            pygame.draw.rect(surf, _COL_BAR_BG, (0, 0, bar_w, 20), border_radius=4)
+            self._panel_cache[key] = surf
+        return surf
+
+    def _controls_blits(self, x: int) -> list:
+        """Blit list for the static CONTROLS block, laid out once per panel x."""
+        key = ("controls", x)
+        blits = self._panel_cache.get(key)
+        if blits is None:
+            y = self.config.GAME_HEIGHT - 140
+            blits = [(self._text(self.font_large, "CONTROLS", _COL_CONTROLS), (x, y))]
+            y += 25
+            for ctrl in self.CONTROL_LINES:
+                blits.append((self._text(self.font, ctrl, _COL_CONTROLS_TEXT), (x, y)))
+                y += 20
+            self._panel_cache[key] = blits
+        return blits
+
     def draw_ui(self, panel_x):
         panel_w = self.config.GAME_WIDTH - panel_x
         
-        pygame.draw.rect(self.screen, (25, 25, 40), (panel_x, 0, panel_w, self.config.GAME_HEIGHT))
-        pygame.draw.line(self.screen, (60, 60, 90), (panel_x, 0), (panel_x, self.config.GAME_HEIGHT), 3)
+        self.screen.blit(self._ui_panel_surface(panel_w), (panel_x - 1, 0))
         
         x = panel_x + 15
         y = 20
         
         # Title
-        title = self.font_title.render(self.game.get("title", "Quest")[:16], True, (255, 215, 0))
+        title = self._text(self.font_title, self.game.get("title", "Quest")[:16], _COL_TITLE)
         self.screen.blit(title, (x, y))
         y += 34
-        level_text = self.font.render(f"Level {self.level_index + 1}/{len(self.levels)}", True, (180, 180, 200))
-        self.screen.blit(level_text, (x, y))
+        level_text = self._display_str("level", (self.level_index + 1, len(self.levels)), "Level {}/{}")
+        self.screen.blit(self._text(self.font, level_text, _COL_LEVEL), (x, y))
         y += 24
         
         # Progress
         done, total, progress_label = self._quest_progress()
-        self.screen.blit(self.font_large.render("PROGRESS", True, (150, 200, 255)), (x, y))
+        self.screen.blit(self._text(self.font_large, "PROGRESS", _COL_PROGRESS), (x, y))
         y += 30
         
         # Progress bar
         bar_w = panel_w - 30
-        pygame.draw.rect(self.screen, (50, 50, 70), (x, y, bar_w, 20), border_radius=4)
+        self.screen.blit(self._progress_bar_bg(bar_w), (x, y))
         if total > 0:
             fill_w = int(bar_w * (done / total))
             if fill_w > 0:
-                pygame.draw.rect(self.screen, (100, 200, 100), (x, y, fill_w, 20), border_radius=4)
-        progress_text = self.font.render(progress_label, True, (255, 255, 255))
-        self.screen.blit(progress_text, (x + 5, y + 2))
+                pygame.draw.rect(self.screen, _COL_BAR_FILL, (x, y, fill_w, 20), border_radius=4)
+        self.screen.blit(self._text(self.font, progress_label, _COL_WHITE), (x + 5, y + 2))
         y += 40
         
         # Inventory
-        self.screen.blit(self.font_large.render("INVENTORY", True, (255, 200, 100)), (x, y))
+        self.screen.blit(self._text(self.font_large, "INVENTORY", _COL_INVENTORY), (x, y))
         y += 28
         
         if self.inventory:
-            for item_name in self.inventory[:5]:
-                self.screen.blit(self.font.render(f"✓ {item_name[:14]}", True, (150, 255, 150)), (x, y))
+            for line in self._inventory_strs():
+                self.screen.blit(self._text(self.font, line, _COL_INVENTORY_ITEM), (x, y))
                 y += 22
         else:
-            self.screen.blit(self.font.render("(empty)", True, (100, 100, 120)), (x, y))
+            self.screen.blit(self._text(self.font, "(empty)", _COL_MUTED), (x, y))
         
         y += 20
 
         # Money
-        self.screen.blit(self.font_large.render("GOLD", True, (255, 230, 120)), (x, y))
+        self.screen.blit(self._text(self.font_large, "GOLD", _COL_GOLD), (x, y))
         y += 24
-        self.screen.blit(self.font.render(f"{getattr(self, 'money', 0)}g", True, (255, 230, 120)), (x, y))
+        money_text = self._display_str("money", (getattr(self, "money", 0),), "{}g")
+        self.screen.blit(self._text(self.font, money_text, _COL_GOLD), (x, y))
         y += 26
 
         # Shop info (when indoors)
@@ -4378,7 +5182,7 @@ class GameEngine:
             b = self.current_building
             goods = b.get("goods") or []
             if goods:
-                self.screen.blit(self.font_large.render(b.get("name", "Shop").upper(), True, (150, 255, 220)), (x, y))
+                self.screen.blit(self._text(self.font_large, b.get("name", "Shop").upper(), _COL_SHOP_NAME), (x, y))
                 y += 26
                 hint = "Press 1/2/3 to buy items."
                 if "repair_bridge" in self.quest_types:
@@ -4387,38 +5191,29 @@ class GameEngine:
                     hint = "Inn: sleep by a bed (SPACE) to advance time. 1/2/3 buy snacks."
                 else:
                     hint = "Shop items are helpful flavor (some quests require specific materials). Press 1/2/3 to buy."
-                self.screen.blit(self.font.render(hint, True, (220, 220, 220)), (x, y))
+                self.screen.blit(self._text(self.font, hint, _COL_TEXT), (x, y))
                 y += 20
-                for i, g in enumerate(goods[:3]):
-                    self.screen.blit(
-                        self.font.render(f"{i+1}. {g['name']} ({g['price']}g)", True, (200, 200, 255)),
-                        (x, y),
-                    )
+                for line in b.get("good_strs") or []:
+                    self.screen.blit(self._text(self.font, line, _COL_ACCENT), (x, y))
                     y += 20
                 y += 6
         
         # Goal
-        self.screen.blit(self.font_large.render("QUEST", True, (255, 150, 150)), (x, y))
+        self.screen.blit(self._text(self.font_large, "QUEST", _COL_QUEST), (x, y))
         y += 26
         if not getattr(self, "quest_known", True):
-            self.screen.blit(self.font.render("→ Talk to the NPC", True, (220, 220, 220)), (x, y))
+            self.screen.blit(self._text(self.font, "→ Talk to the NPC", _COL_TEXT), (x, y))
             y += 20
         else:
-            goal_text = self.quest.get("goal", "Complete the quest") if hasattr(self, "quest") else "Complete the quest"
-            self.screen.blit(self.font.render(goal_text[:26], True, (220, 220, 220)), (x, y))
+            quest_ui = self._quest_ui()
+            self.screen.blit(self._text(self.font, quest_ui["goal"], _COL_TEXT), (x, y))
             y += 22
-            for line in self._quest_steps()[:4]:
-                self.screen.blit(self.font.render(line[:28], True, (200, 200, 200)), (x, y))
+            for line in quest_ui["steps"]:
+                self.screen.blit(self._text(self.font, line, _COL_TEXT_DIM), (x, y))
                 y += 20
         
         # Controls
-        y = self.config.GAME_HEIGHT - 140
-        self.screen.blit(self.font_large.render("CONTROLS", True, (100, 180, 255)), (x, y))
-        y += 25
-        controls = ["WASD - Move", "SPACE - Interact", "1-3 - Buy (Indoor)", "N/ENTER - Next Level", "R - Restart", "ESC - Quit"]
-        for ctrl in controls:
-            self.screen.blit(self.font.render(ctrl, True, (120, 120, 150)), (x, y))
-            y += 20
+        self.screen.blits(self._controls_blits(x), doreturn=False)
 
 
 # ============================================================
@@ -4428,505 +5223,235 @@ class GameEngine:
 app = Flask(__name__)
 config = Config()
 
-HTML = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>🎮 Game Generator</title>
-    <style>
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body {
-            font-family: 'Segoe UI', Arial, sans-serif;
-            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-            min-height: 100vh; color: white; padding: 20px;
-        }
-        .container { max-width: 700px; margin: 0 auto; }
-        h1 {
-            text-align: center; font-size: 2.2em; margin-bottom: 8px;
-            background: linear-gradient(90deg, #4ade80, #22d3ee);
-            -webkit-background-clip: text; -webkit-text-fill-color: transparent;
-        }
-        .subtitle { text-align: center; color: #888; margin-bottom: 25px; }
-        .card {
-            background: rgba(255,255,255,0.06); border-radius: 12px;
-            padding: 20px; margin-bottom: 15px;
-            border: 1px solid rgba(255,255,255,0.1);
-        }
-        label { display: block; margin-bottom: 8px; color: #4ade80; font-weight: bold; }
-        input[type="password"], input[type="text"], input[type="number"], textarea {
-            width: 100%; padding: 12px; border: 2px solid #333;
-            border-radius: 8px; background: #0f0f23; color: white; font-size: 15px;
-        }
-        input[type="checkbox"] {
-            width: auto;
-            padding: 0;
-            margin: 0;
-            accent-color: #4ade80;
-            transform: scale(1.12);
-            cursor: pointer;
-        }
-        label { cursor: pointer; }
-        input:focus, textarea:focus { border-color: #4ade80; outline: none; }
-        textarea { height: 80px; resize: none; }
-        button {
-            width: 100%; padding: 14px; font-size: 18px; font-weight: bold;
-            border: none; border-radius: 8px; cursor: pointer;
-            background: linear-gradient(90deg, #4ade80, #22d3ee); color: #1a1a2e;
-        }
-        button:hover { transform: scale(1.02); }
-        button:disabled { background: #444; color: #888; transform: none; }
-        .status { text-align: center; padding: 15px; font-size: 16px; }
-        .examples { display: flex; gap: 8px; flex-wrap: wrap; margin: 12px 0; }
-        .ex-btn {
-            padding: 8px 12px; font-size: 13px; width: auto;
-            background: rgba(74, 222, 128, 0.15); border: 1px solid #4ade80; color: #4ade80;
-        }
-        .rand-btn {
-            margin-top: 8px;
-            padding: 10px 12px;
-            font-size: 14px;
-            width: 100%;
-            background: rgba(34, 211, 238, 0.2);
-            border: 1px solid #22d3ee;
-            color: #22d3ee;
-        }
-        .levels {
-            display: flex;
-            gap: 8px;
-            align-items: center;
-            margin-top: 10px;
-        }
-        .levels input {
-            width: 80px;
-            text-align: center;
-        }
-        .tag { background: #4ade80; color: #1a1a2e; padding: 3px 10px; border-radius: 4px; font-size: 12px; }
-        .features { font-size: 14px; color: #aaa; line-height: 1.8; }
-        .features b { color: #4ade80; }
-        a { color: #22d3ee; }
-        .spinner {
-            display: inline-block; width: 18px; height: 18px;
-            border: 3px solid #fff; border-top-color: transparent;
-            border-radius: 50%; animation: spin 1s linear infinite; margin-right: 10px;
-        }
-        @keyframes spin { to { transform: rotate(360deg); } }
-        .new { color: #22d3ee; font-size: 11px; margin-left: 5px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🎮 Game Generator</h1>
-        <p class="subtitle">Prompt‑Driven Adventure Generator <span class="tag">NEW</span></p>
-        
-        <div class="card">
-            <label>🔑 OpenAI API Key</label>
-            <input type="password" id="apiKey" placeholder="sk-...">
-            <small style="color:#666">Get key: <a href="https://platform.openai.com/api-keys" target="_blank">platform.openai.com</a></small>
-        </div>
-        
-        <div class="card">
-            <label>✨ Describe Your World</label>
-            <textarea id="prompt" placeholder="A peaceful forest village with a friendly wizard and hidden treasures..."></textarea>
-            <div style="color:#93a4c0; font-size:12px; margin-top:8px; line-height:1.5">
-                You can be high-level or detailed in the prompt.<br>
-                High-level example: <code>a snowy kingdom at night</code>.<br>
-                Detailed example: <code>Level 1 Biome: snow</code>, <code>Level 2: lost_item</code>, <code>Time: night</code>, hero and NPC look/style notes.
-            </div>
-            <div class="examples">
-                <button class="ex-btn" onclick="setBiomeHint('meadow')">🌿 Meadow</button>
-                <button class="ex-btn" onclick="setBiomeHint('forest')">🌲 Forest</button>
-                <button class="ex-btn" onclick="setBiomeHint('town')">🏘️ Town</button>
-                <button class="ex-btn" onclick="setBiomeHint('beach')">🏖️ Beach</button>
-                <button class="ex-btn" onclick="setBiomeHint('snow')">❄️ Snow</button>
-                <button class="ex-btn" onclick="setBiomeHint('desert')">🏜️ Desert</button>
-                <button class="ex-btn" onclick="setBiomeHint('ruins')">🏛️ Ruins</button>
-                <button class="ex-btn" onclick="setBiomeHint('castle')">🏰 Castle</button>
-            </div>
-            <div class="examples" style="margin-top:8px">
-                <button class="ex-btn" onclick="setTimeHint('day')">☀️ Day</button>
-                <button class="ex-btn" onclick="setTimeHint('dawn')">🌅 Dawn</button>
-                <button class="ex-btn" onclick="setTimeHint('sunset')">🌇 Sunset</button>
-                <button class="ex-btn" onclick="setTimeHint('night')">🌙 Night</button>
-            </div>
-            <div class="levels">
-                <label style="margin:0; color:#22d3ee;">Time of Day</label>
-                <select id="timeSelect" style="width:220px; padding:10px; border-radius:8px; background:#0f0f23; color:white; border:2px solid #333">
-                    <option value="">Auto (from prompt/random)</option>
-                    <option value="day">Day</option>
-                    <option value="dawn">Dawn</option>
-                    <option value="sunset">Sunset</option>
-                    <option value="night">Night</option>
-                </select>
-                <span style="color:#888; font-size:12px;">(optional, applies to Level 1 unless Level N Time is set)</span>
-            </div>
-            <div style="color:#93a4c0; font-size:12px; margin-top:4px; line-height:1.5">
-                Auto means you are not forcing a value here. Auto lets the generator decide unless the prompt explicitly sets it.
-            </div>
-            <button class="rand-btn" onclick="randomPrompt()">🎲 Generate Random Prompt</button>
-            <div class="levels">
-                <label style="margin:0; color:#22d3ee;">Levels</label>
-                <input type="number" id="levels" min="1" max="3" value="3" onchange="syncLevelUI()">
-                <span style="color:#888; font-size:12px;">(1-3)</span>
-            </div>
-            <div style="color:#93a4c0; font-size:12px; margin-top:6px; line-height:1.5">
-                If you leave settings unspecified (in prompt or UI), the generator will create them for you automatically.
-            </div>
-            <div class="levels">
-                <label style="margin:0; color:#22d3ee;">Quality</label>
-                <select id="quality" style="width:160px; padding:10px; border-radius:8px; background:#0f0f23; color:white; border:2px solid #333">
-                    <option value="low">Low (cheapest)</option>
-                    <option value="medium" selected>Medium</option>
-                    <option value="high">High (best)</option>
-                </select>
-                <span style="color:#888; font-size:12px;">(affects cost)</span>
-            </div>
-            <div class="levels">
-                <label style="margin:0; color:#22d3ee;">Terrain Style</label>
-                <select id="terrainStyle" style="width:180px; padding:10px; border-radius:8px; background:#0f0f23; color:white; border:2px solid #333">
-                    <option value="smooth" selected>Smooth</option>
-                    <option value="classic">Classic</option>
-                </select>
-                <span style="color:#888; font-size:12px;">(visual only)</span>
-            </div>
-            <div class="levels" style="margin-top:10px; display:block">
-                <label style="margin:0; color:#22d3ee;">Goals (per level, optional)</label>
-                <div style="color:#888; font-size:12px; margin-top:6px">
-                    Pick goal options under each level. If you select multiple goals for a level, they are stacked. If a level is blank in both UI and prompt, goals for that level are auto-generated.
-                </div>
-                <div style="color:#7f8da8; font-size:12px; margin-top:4px">
-                    Each <b>Level N biome</b> dropdown controls that level only.
-                </div>
-                <div style="display:flex; gap:10px; margin-top:8px">
-                    <button class="ex-btn" onclick="clearGoals()" style="background:#0b1220">Clear Goal Selections</button>
-                    <button class="ex-btn" onclick="randomGoals()" style="background:#0b1220">🎲 Randomize Goals</button>
-                </div>
-
-                <div id="goalLevels" style="margin-top:10px; display:flex; gap:10px; flex-wrap:wrap">
-                    <div class="card" style="padding:12px; margin:0; width: 100%">
-                        <div style="font-weight:800; color:#cbd5e1; margin-bottom:8px">Level 1 goals</div>
-                        <div style="display:flex; align-items:center; gap:8px; margin-bottom:8px">
-                            <span style="color:#94a3b8; font-size:12px; min-width:96px">Level 1 biome</span>
-                            <select id="biomeL1" style="width:180px; padding:8px; border-radius:8px; background:#0f0f23; color:white; border:2px solid #333">
-                                <option value="">Auto</option>
-                                <option value="meadow">Meadow</option>
-                                <option value="forest">Forest</option>
-                                <option value="town">Town</option>
-                                <option value="beach">Beach</option>
-                                <option value="snow">Snow</option>
-                                <option value="desert">Desert</option>
-                                <option value="ruins">Ruins</option>
-                                <option value="castle">Castle</option>
-                            </select>
-                        </div>
-                        <div style="display:flex; gap:10px; flex-wrap:wrap">
-                            <label for="goal-l1-cure" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l1-cure" type="checkbox" class="goalOptL1" value="cure"> Cure
-                            </label>
-                            <label for="goal-l1-key" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l1-key" type="checkbox" class="goalOptL1" value="key_and_door"> Key+Door
-                            </label>
-                            <label for="goal-l1-lost" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l1-lost" type="checkbox" class="goalOptL1" value="lost_item"> Lost Item
-                            </label>
-                            <label for="goal-l1-bridge" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l1-bridge" type="checkbox" class="goalOptL1" value="repair_bridge"> Repair Bridge
-                            </label>
-                        </div>
-                    </div>
-
-                    <div id="goalL2" class="card" style="padding:12px; margin:0; width: 100%">
-                        <div style="font-weight:800; color:#cbd5e1; margin-bottom:8px">Level 2 goals</div>
-                        <div style="display:flex; align-items:center; gap:8px; margin-bottom:8px">
-                            <span style="color:#94a3b8; font-size:12px; min-width:96px">Level 2 biome</span>
-                            <select id="biomeL2" style="width:180px; padding:8px; border-radius:8px; background:#0f0f23; color:white; border:2px solid #333">
-                                <option value="">Auto</option>
-                                <option value="meadow">Meadow</option>
-                                <option value="forest">Forest</option>
-                                <option value="town">Town</option>
-                                <option value="beach">Beach</option>
-                                <option value="snow">Snow</option>
-                                <option value="desert">Desert</option>
-                                <option value="ruins">Ruins</option>
-                                <option value="castle">Castle</option>
-                            </select>
-                        </div>
-                        <div style="display:flex; gap:10px; flex-wrap:wrap">
-                            <label for="goal-l2-cure" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l2-cure" type="checkbox" class="goalOptL2" value="cure"> Cure
-                            </label>
-                            <label for="goal-l2-key" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l2-key" type="checkbox" class="goalOptL2" value="key_and_door"> Key+Door
-                            </label>
-                            <label for="goal-l2-lost" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l2-lost" type="checkbox" class="goalOptL2" value="lost_item"> Lost Item
-                            </label>
-                            <label for="goal-l2-bridge" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l2-bridge" type="checkbox" class="goalOptL2" value="repair_bridge"> Repair Bridge
-                            </label>
-                        </div>
-                    </div>
-
-                    <div id="goalL3" class="card" style="padding:12px; margin:0; width: 100%">
-                        <div style="font-weight:800; color:#cbd5e1; margin-bottom:8px">Level 3 goals</div>
-                        <div style="display:flex; align-items:center; gap:8px; margin-bottom:8px">
-                            <span style="color:#94a3b8; font-size:12px; min-width:96px">Level 3 biome</span>
-                            <select id="biomeL3" style="width:180px; padding:8px; border-radius:8px; background:#0f0f23; color:white; border:2px solid #333">
-                                <option value="">Auto</option>
-                                <option value="meadow">Meadow</option>
-                                <option value="forest">Forest</option>
-                                <option value="town">Town</option>
-                                <option value="beach">Beach</option>
-                                <option value="snow">Snow</option>
-                                <option value="desert">Desert</option>
-                                <option value="ruins">Ruins</option>
-                                <option value="castle">Castle</option>
-                            </select>
-                        </div>
-                        <div style="display:flex; gap:10px; flex-wrap:wrap">
-                            <label for="goal-l3-cure" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l3-cure" type="checkbox" class="goalOptL3" value="cure"> Cure
-                            </label>
-                            <label for="goal-l3-key" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l3-key" type="checkbox" class="goalOptL3" value="key_and_door"> Key+Door
-                            </label>
-                            <label for="goal-l3-lost" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l3-lost" type="checkbox" class="goalOptL3" value="lost_item"> Lost Item
-                            </label>
-                            <label for="goal-l3-bridge" style="display:flex; align-items:center; gap:6px; color:#cbd5e1; font-size:13px">
-                                <input id="goal-l3-bridge" type="checkbox" class="goalOptL3" value="repair_bridge"> Repair Bridge
-                            </label>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <button id="btn" onclick="generate()">🌟 Generate World!</button>
-        <div id="status" class="status" style="display:none;"></div>
-        
-        <div class="card features">
-            <b>✨ How Generation Works:</b><br>
-            • Your prompt sets the world theme (biome/time/vibe) and character style, and can also set exact per-level controls.<br>
-            • You can assign biome per level in prompt (<code>Level 1 Biome: snow</code>) or in UI (<code>Level 1 biome</code>, <code>Level 2 biome</code>, <code>Level 3 biome</code> dropdowns).<br>
-            • You can assign goals per level in prompt (<code>Level 2: repair_bridge</code>) or in UI checkboxes under each level.<br>
-            • Prompt <code>Time:</code>, <code>Hero look:</code>, and <code>NPC look:</code> apply to Level 1 by default. Levels 2/3 randomize those unless you set <code>Level N Time:</code>.<br>
-            • If prompt and UI both set the same level value, prompt wins for that level.<br>
-            • If a level is unspecified in both prompt and UI, that level biome/goals are auto-generated.<br>
-            • If you check multiple goals for one level, they are stacked and all must be completed.<br>
-            • Random Prompt samples only valid supported biomes/times/layouts/goals.<br>
-        </div>
-    </div>
-    
-    <script>
-        function setEx(t) { document.getElementById('prompt').value = t; }
-        function setBiomeHint(biome) {
-            const el = document.getElementById('prompt');
-            const p = (el.value || '').trim();
-            if (!p) {
-                el.value = `Biome: ${biome}.`;
-                return;
-            }
-            if (/\\bBiome\\s*:/i.test(p)) {
-                el.value = p.replace(/\\bBiome\\s*:\\s*[^.\\n]+/i, `Biome: ${biome}`);
-            } else {
-                el.value = `${p} Biome: ${biome}.`;
-            }
-        }
-        function setTimeHint(tod) {
-            const el = document.getElementById('prompt');
-            const p = (el.value || '').trim();
-            if (!p) {
-                el.value = `Time: ${tod}.`;
-                return;
-            }
-            if (/\\bTime\\s*:/i.test(p)) {
-                el.value = p.replace(/\\bTime\\s*:\\s*[^.\\n]+/i, `Time: ${tod}`);
-            } else {
-                el.value = `${p} Time: ${tod}.`;
-            }
-        }
-        function randomPrompt() {
-            // These arrays are intentionally aligned with the README's "fixed (finite sets)" so the
-            // randomizer can hit all supported biomes / times / layout styles and trigger themed decor.
-            const biomes = [
-                "meadow", "forest", "town", "beach", "snow", "desert", "ruins", "castle"
-            ];
-            const times = ["day", "dawn", "sunset", "night"];
-            const layouts = [
-                "winding_road", "crossroads", "ring_road", "plaza", "market_street",
-                "coastline", "riverbend", "islands", "oasis", "lake_center",
-                "maze_grove", "ruin_ring"
-            ];
-            const decorTags = [
-                "cacti", "shells", "snow piles", "crates", "statues", "vines", "mushrooms", "lanterns", "harbor", "bazaar"
-            ];
-            const places = [
-                "a quiet town", "a lantern-lit harbor", "an ancient temple ruin", "a cliffside castle courtyard",
-                "a snowy mountain hamlet", "a windy beach coast", "a misty forest grove", "a sunlit meadow"
-            ];
-            const heroes = [
-                "a red‑scarf alchemist’s apprentice", "a green‑cloaked ranger",
-                "a sailor‑adventurer with a brass compass", "a traveling bard with a lute",
-                "a young mage with a star brooch"
-            ];
-            const npcs = [
-                "a gentle healer", "a shrine keeper", "a friendly innkeeper",
-                "a wise librarian", "a village guard captain"
-            ];
-            const hooks = [
-                "gather three rare ingredients to brew a remedy",
-                "recover a lost heirloom hidden nearby",
-                "unlock an ancient gate with a hidden key",
-                "repair a broken bridge with materials from the shop",
-                "return a lost item to someone worried"
-            ];
-            const pick = (arr) => arr[Math.floor(Math.random() * arr.length)];
-            const biome = pick(biomes);
-            const tod = pick(times);
-            const layout = pick(layouts);
-            const tag = pick(decorTags);
-            const place = pick(places);
-            // Include explicit tokens so the hint extractor/layout parser can lock onto them.
-            const prompt = `Setting: ${place}. Biome: ${biome}. Time: ${tod}. Layout: ${layout}. Theme: ${tag}. ` +
-                `The hero is ${pick(heroes)}. The NPC is ${pick(npcs)}. The quest is to ${pick(hooks)}.`;
-            document.getElementById('prompt').value = prompt;
-            // Randomize per-level goal options too (covers all allowed goal types over time).
-            randomGoals();
-        }
+# Per-level goal checkboxes on the UI page: (goal value, element id slug, label).
+# Sent to the page as JSON with the biome list; app.js builds the level cards from it.
+UI_GOAL_CHOICES = [
+    ("cure", "cure", "Cure"),
+    ("key_and_door", "key", "Key+Door"),
+    ("lost_item", "lost", "Lost Item"),
+    ("repair_bridge", "bridge", "Repair Bridge"),
+]
 
-        function clearGoals() {
-            document.querySelectorAll('.goalOptL1, .goalOptL2, .goalOptL3').forEach(e => { e.checked = false; });
-        }
 
-        function biomesByLevel() {
-            return [
-                document.getElementById('biomeL1').value || '',
-                document.getElementById('biomeL2').value || '',
-                document.getElementById('biomeL3').value || '',
-            ];
-        }
+def _minify_asset(text: str, kind: str) -> str:
+    """
+    Conservative minifier for the page's own html/css/js: only whitespace and comments go.
+    JS and HTML keep their line breaks so semicolon insertion and inline text are unaffected
+    (neither file has multi-line strings or <pre> blocks).
+    """
+    if kind == "css":
+        text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+        text = re.sub(r"\s+", " ", text)
+        text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+        text = re.sub(r":\s+", ":", text)
+        return text.replace(";}", "}").strip()
+    out = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not (kind == "js" and line.startswith("//")):
+            out.append(line)
+    return "\n".join(out)
 
-        function randomGoals() {
-            clearGoals();
-            const all = ['cure','key_and_door','lost_item','repair_bridge'];
-            const pickN = (n) => {
-                const c = all.slice().sort(() => Math.random() - 0.5);
-                return new Set(c.slice(0, n));
-            };
-            // For each level, pick 1-2 candidate goals (stacking options per level).
-            const l1 = pickN(1 + Math.floor(Math.random() * 2));
-            const l2 = pickN(1 + Math.floor(Math.random() * 2));
-            const l3 = pickN(1 + Math.floor(Math.random() * 2));
-            document.querySelectorAll('.goalOptL1').forEach(e => { e.checked = l1.has(e.value); });
-            document.querySelectorAll('.goalOptL2').forEach(e => { e.checked = l2.has(e.value); });
-            document.querySelectorAll('.goalOptL3').forEach(e => { e.checked = l3.has(e.value); });
-        }
 
-        function syncLevelUI() {
-            const levels = parseInt(document.getElementById('levels').value || '3', 10);
-            const show2 = levels >= 2;
-            const show3 = levels >= 3;
-            document.getElementById('goalL2').style.display = show2 ? 'block' : 'none';
-            document.getElementById('goalL3').style.display = show3 ? 'block' : 'none';
-        }
+def _precompress(body: bytes, mimetype: str, cache_control: str, extra_headers: dict | None = None) -> dict:
+    """
+    Identity and gzip variants of a response that never changes while the server runs:
+    {use_gzip: (bytes, etag, full headers, 304 headers)}, all computed once.
+    """
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    variants = {}
+    for use_gz, data in ((False, body), (True, gzip.compress(body, 9))):
+        tag = etag + ("-gz" if use_gz else "")
+        not_modified = {"ETag": f'"{tag}"', "Vary": "Accept-Encoding", "Cache-Control": cache_control}
+        headers = dict(not_modified, **{"Content-Type": f"{mimetype}; charset=utf-8", "Content-Length": str(len(data))})
+        headers.update(extra_headers or {})
+        if use_gz:
+            headers["Content-Encoding"] = "gzip"
+        variants[use_gz] = (data, tag, headers, not_modified)
+    return variants
+
+
+def _precompressed_response(variants: dict) -> Response:
+    data, tag, headers, not_modified = variants["gzip" in request.accept_encodings]
+    if request.if_none_match.contains(tag):
+        return Response(status=304, headers=not_modified)
+    # Bytes and headers are final; skip Werkzeug's re-encoding and header fix-ups.
+    return Response(data, headers=headers, direct_passthrough=True)
+
+
+# The page's CSS/JS live in static/ and are minified once at import. They are linked
+# with a content-hash query, so browsers and proxies may cache them for a year.
+ASSETS = {}
+for _name, _mimetype in (("app.css", "text/css"), ("app.js", "text/javascript")):
+    with open(os.path.join(app.static_folder, _name), encoding="utf-8") as _f:
+        _body = _minify_asset(_f.read(), _name.rsplit(".", 1)[1]).encode("utf-8")
+    ASSETS[_name] = _precompress(_body, _mimetype, "public, max-age=31536000, immutable")
+ASSET_VERSION = hashlib.blake2b(b"".join(a[False][0] for a in ASSETS.values()), digest_size=8).hexdigest()
+
+# The UI page is a Jinja template with no per-request state; render it once so the
+# gzip body and ETag are precomputed.
+with app.app_context():
+    HTML_PAGE = _precompress(_minify_asset(
+        app.jinja_env.overlay(trim_blocks=True, lstrip_blocks=True).get_template("index.html").render(
+            UI_OPTIONS={"levels": [1, 2, 3], "biomes": ALLOWED_BIOMES, "goals": UI_GOAL_CHOICES},
+            ASSET_VERSION=ASSET_VERSION,
+        ),
+        "html",
+    ).encode("utf-8"), "text/html", "no-cache", {
+        # Let the browser fetch the CSS/JS while it is still parsing the page.
+        "Link": (f"</assets/app.css?v={ASSET_VERSION}>; rel=preload; as=style, "
+                 f"</assets/app.js?v={ASSET_VERSION}>; rel=preload; as=script"),
+    })
+
+class JobStore:
+    """
+    Thread-safe store of /generate runs keyed by job id.
+    Each job has a status dict for polling and an append-only list of progress events
+    for streaming; finished worlds queue up for the terminal loop.
+    """
+
+    def __init__(self, keep: int = 32):
+        self.keep = keep
+        self._cond = threading.Condition()
+        self._jobs: dict[str, dict] = {}
+        self._events: dict[str, list] = {}
+        self._ready: queue.Queue = queue.Queue()
+
+    def create(self) -> str:
+        job_id = uuid.uuid4().hex
+        with self._cond:
+            self._jobs[job_id] = {"status": "running"}
+            self._events[job_id] = []
+            # Only recent jobs are worth polling; drop the oldest.
+            while len(self._jobs) > self.keep:
+                old = next(iter(self._jobs))
+                self._jobs.pop(old)
+                self._events.pop(old, None)
+        return job_id
+
+    def update(self, job_id: str, **fields):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def emit(self, job_id: str, event: str, data: dict):
+        with self._cond:
+            events = self._events.get(job_id)
+            if events is not None:
+                events.append((event, data))
+                self._cond.notify_all()
+
+    def events_since(self, job_id: str, start: int, timeout: float) -> list | None:
+        """Events after index `start`, waiting up to timeout for one; None if the job is gone."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._events.get(job_id, ())) > start or job_id not in self._events, timeout)
+            events = self._events.get(job_id)
+            return None if events is None else events[start:]
+
+    def fail(self, job_id: str, error: str):
+        self.update(job_id, status="error", error=error)
+        self.emit(job_id, "failed", {"error": error})
+
+    def finish(self, job_id: str, levels: list):
+        self.update(job_id, status="done", levels=len(levels))
+        self._ready.put(levels)
+        self.emit(job_id, "done", {"levels": len(levels)})
+
+    def next_ready(self, timeout: float | None = None) -> list | None:
+        """Levels of the next finished job, or None if none finishes within timeout (None waits forever)."""
+        try:
+            return self._ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
-        function goalsByLevel() {
-            const grab = (cls) => {
-                const out = [];
-                document.querySelectorAll(cls).forEach(e => { if (e.checked) out.push(e.value); });
-                return out;
-            };
-            return [grab('.goalOptL1'), grab('.goalOptL2'), grab('.goalOptL3')];
-        }
-        async function generate() {
-            const key = document.getElementById('apiKey').value;
-            let prompt = document.getElementById('prompt').value;
-            const tod = document.getElementById('timeSelect').value || '';
-            const levels = parseInt(document.getElementById('levels').value || '3', 10);
-            const goalByLevel = goalsByLevel();
-            const biomeByLevel = biomesByLevel();
-            const quality = document.getElementById('quality').value || 'medium';
-            const terrainStyle = document.getElementById('terrainStyle').value || 'smooth';
-            if (!key) return alert('Enter API key!');
-            if (!prompt) return alert('Describe your world!');
-            if (tod && !/\\bTime\\s*:/i.test(prompt)) {
-                prompt = `${prompt.trim()} Time: ${tod}.`;
-            }
-            document.getElementById('btn').disabled = true;
-            const status = document.getElementById('status');
-            status.style.display = 'block';
-            status.innerHTML = '<span class="spinner"></span> Generating world (20-30 sec)...';
-            try {
-                const res = await fetch('/generate', {
-                    method: 'POST', headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        apiKey: key,
-                        prompt: prompt,
-                        levels: levels,
-                        goalByLevel: goalByLevel,
-                        biomeByLevel: biomeByLevel,
-                        timeOfDay: tod,
-                        quality: quality,
-                        terrainStyle: terrainStyle
-                    })
-                });
-                const data = await res.json();
-                status.innerHTML = data.success ? '✅ Done! Go to terminal and press ENTER!' : '❌ ' + data.error;
-            } catch (e) { status.innerHTML = '❌ ' + e.message; }
-            document.getElementById('btn').disabled = false;
-        }
-        // Initialize visibility
-        syncLevelUI();
-    </script>
-</body>
-</html>
-'''
 
-pending_game = {"ready": False, "levels": []}
+jobs = JobStore()
 
 @app.route('/')
 def index():
-    return render_template_string(HTML)
+    # Served with no-cache: revalidate on each load (cheap 304) so a restarted server never
+    # serves a stale page.
+    return _precompressed_response(HTML_PAGE)
+
+@app.route('/assets/<name>')
+def asset(name):
+    if name not in ASSETS:
+        return jsonify({"error": "not found"}), 404
+    return _precompressed_response(ASSETS[name])
 
 @app.route('/generate', methods=['POST'])
 def generate():
-    global pending_game
-    try:
-        data = request.json
-        config.OPENAI_API_KEY = data['apiKey']
+    """Start a generation run in the background; progress streams from /job/<id>/events."""
+    data = request.json or {}
+    if not data.get("apiKey"):
+        return jsonify({"success": False, "error": "Missing apiKey"})
+    job_id = jobs.create()
+    threading.Thread(target=_run_generation, args=(job_id, data), daemon=True).start()
+    return jsonify({"success": True, "jobId": job_id})
+
+
+class _RunLog:
+    """Progress lines of one generation run, written to stdout in chunks instead of one write per line."""
+
+    FLUSH_LINES = 16
+
+    def __init__(self):
+        self._lines: list[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, line):
+        with self._lock:
+            self._lines.append(str(line))
+            if len(self._lines) >= self.FLUSH_LINES:
+                self._write()
+
+    def flush(self):
+        """Write whatever is buffered; called at the end of each phase so progress never lags far."""
+        with self._lock:
+            self._write()
 
+    def _write(self):
+        if self._lines:
+            sys.stdout.write("\n".join(self._lines) + "\n")
+            sys.stdout.flush()
+            self._lines.clear()
+
+
+def _run_generation(job_id: str, data: dict):
+    # The designer, client and sprite pools all log through `say`, so their lines keep their order.
+    say = _RunLog()
+    try:
         # Per-run model/quality selection (from UI)
-        q = str(data.get("quality") or "medium").lower().strip()
-        if q not in ["low", "medium", "high"]:
-            q = "medium"
-        Config.IMAGE_QUALITY = q
-        # Text model choice by quality tier
-        # - low/medium: cheaper model
-        # - high: higher quality, higher cost
-        Config.TEXT_MODEL = "gpt-4o-mini" if q in ["low", "medium"] else "gpt-4o"
-        # Item sprite generation budget by quality.
-        # - low: no per-quest item sprites (uses a generic icon)
-        # - medium: generate 1 item sprite per level
-        # - high: generate 2 item sprites per level
-        Config.ITEM_SPRITES_PER_LEVEL = 0 if q == "low" else (2 if q == "high" else 1)
-        terrain_style = str(data.get("terrainStyle") or "smooth").lower().strip()
-        Config.TERRAIN_STYLE = terrain_style if terrain_style in ["smooth", "classic"] else "smooth"
-        
-        client = OpenAIClient(config.OPENAI_API_KEY)
+        run = RunConfig.from_request(data)
+        client = OpenAIClient(data['apiKey'], run, log=say)
         
-        print("\n" + "="*50)
-        print("PROMPTQUEST - AI PIXEL ADVENTURE")
-        print("="*50)
+        say("\n" + "="*50)
+        say("PROMPTQUEST - AI PIXEL ADVENTURE")
+        say("="*50)
         
-        print("\n[1/2] Designing worlds...")
+        say("\n[1/2] Designing worlds...")
+        say.flush()
         designer = GameDesigner(client)
         levels = []
-        level_count = int(data.get("levels", 3))
-        level_count = max(1, min(3, level_count))
+        # The UI sends one {"biome", "goals"} entry per level to play; a bare count still means all-auto levels.
+        raw_levels = data.get("levels") or []
+        if not isinstance(raw_levels, list):
+            try:
+                raw_levels = [{}] * max(0, min(3, int(raw_levels)))
+            except (TypeError, ValueError):
+                raw_levels = []
+        level_specs = [spec for spec in raw_levels[:3] if isinstance(spec, dict)]
+        level_count = max(1, len(level_specs))
+        by_level_raw = [spec.get("goals") or [] for spec in level_specs]
+        biome_by_level_raw = [spec.get("biome") or "" for spec in level_specs]
 
         prompt = data.get("prompt", "")
-        by_level_raw = data.get("goalByLevel") or []
-        biome_by_level_raw = data.get("biomeByLevel") or []
         ui_time = normalize_time_of_day(data.get("timeOfDay") or "")
         quest_plans = build_quest_plans(prompt=prompt, by_level_raw=by_level_raw, level_count=level_count)
         biome_plans = build_biome_plans(prompt=prompt, by_level_raw=biome_by_level_raw, level_count=level_count)
@@ -4934,14 +5459,8 @@ def generate():
         followup_prompt_base = strip_first_level_only_directives(prompt)
 
         base_player = None
-        base_player_sprite = None
-        reuse_shop_npc = None
-        reuse_inn_npc = None
-        reuse_guest_a = None
-        reuse_guest_b = None
-        reuse_building_shop = None
-        reuse_building_inn = None
 
+        level_prompts = []
         for i in range(level_count):
             level_prompt = (
                 data["prompt"]
@@ -4949,55 +5468,93 @@ def generate():
                 else f"{followup_prompt_base} -- New area {i+1} with different terrain, new NPC, and new objectives."
             )
             # Force/seed level biome from prompt or UI plan, with random fallback already resolved.
-            level_prompt = f"{level_prompt} Level {i+1} Biome: {biome_plans[i]}. Level {i+1} Time: {time_plans[i]}."
-            game = designer.design_game(level_prompt, quest_plan_override=quest_plans[i])
+            level_prompts.append(f"{level_prompt} Level {i+1} Biome: {biome_plans[i]}. Level {i+1} Time: {time_plans[i]}.")
+
+        games = None
+        if Config.BATCH_LEVEL_DESIGN and level_count > 1:
+            try:
+                games = designer.design_games_batch(level_prompts, quest_plans)
+            except Exception as e:
+                say(f"  ⚠ batched design failed ({e}); designing levels separately")
+        if games is None:
+            # Level designs are independent text calls; overlap their round-trips.
+            with ThreadPoolExecutor(max_workers=level_count) as pool:
+                games = list(pool.map(
+                    lambda i: designer.design_game(level_prompts[i], quest_plan_override=quest_plans[i]),
+                    range(level_count),
+                ))
+        say.flush()
+
+        for game in games:
+            game["terrain_style"] = run.terrain_style
             if base_player is None:
                 base_player = game["player"]
             else:
                 game["player"] = base_player
-            print(f"Level {i+1} Title: {game.get('title')}")
-            print(f"Time: {game.get('time_of_day', 'day')}")
-            print(f"Terrain: {game.get('terrain', {}).get('type', 'meadow')}")
-            
-            print("\n[2/2] Generating sprites...")
-            # Reuse some sprites across levels to reduce image calls.
-            game["_reuse_sprites"] = {
-                "npc_shop": reuse_shop_npc,
-                "npc_inn": reuse_inn_npc,
-                "npc_guest_a": reuse_guest_a,
-                "npc_guest_b": reuse_guest_b,
-                "building_shop": reuse_building_shop,
-                "building_inn": reuse_building_inn,
-            }
-            sprites = SpriteGenerator(client, config.API_DELAY).generate_all(game, reuse_player_sprite=base_player_sprite)
-            if base_player_sprite is None:
-                base_player_sprite = sprites.get("player")
-            if reuse_shop_npc is None:
-                reuse_shop_npc = sprites.get("npc_shop")
-            if reuse_inn_npc is None:
-                reuse_inn_npc = sprites.get("npc_inn")
-            if reuse_guest_a is None:
-                reuse_guest_a = sprites.get("npc_guest_a")
-            if reuse_guest_b is None:
-                reuse_guest_b = sprites.get("npc_guest_b")
-            if reuse_building_shop is None:
-                reuse_building_shop = sprites.get("building_shop")
-            if reuse_building_inn is None:
-                reuse_building_inn = sprites.get("building_inn")
-            levels.append({"game": game, "sprites": sprites})
-        
-        pending_game = {"ready": True, "levels": levels}
-        
-        return jsonify({"success": True})
+
+        # Every level starts at once. The player and town sprites have the same descriptions on every
+        # level, so the sprite memo makes one API call for each and the other levels wait on it.
+        def render_level(i: int) -> dict:
+            game = games[i]
+            say(f"Level {i+1} Title: {game.get('title')}")
+            jobs.emit(job_id, "level", {"level": i + 1, "count": level_count, "title": game.get("title")})
+            say(f"Time: {game.get('time_of_day', 'day')}")
+            say(f"Terrain: {game.get('terrain', {}).get('type', 'meadow')}")
+
+            say("\n[2/2] Generating sprites...")
+            sprites = SpriteGenerator(client).generate_all(game)
+            say.flush()
+            jobs.emit(job_id, "sprites", {"level": i + 1, "count": level_count})
+            return {"game": game, "sprites": sprites}
+
+        with ThreadPoolExecutor(max_workers=level_count) as pool:
+            levels.extend(pool.map(render_level, range(level_count)))
+
+        jobs.finish(job_id, levels)
     except Exception as e:
         import traceback
-        traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)})
+        say(traceback.format_exc())
+        jobs.fail(job_id, str(e))
+    finally:
+        say.flush()
+
+
+@app.route('/job/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job)
+
+
+@app.route('/job/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events stream of a job's progress, ending with `done` or `failed`."""
+    if jobs.get(job_id) is None:
+        return jsonify({"error": "unknown job"}), 404
+
+    def stream():
+        seen = 0
+        while True:
+            batch = jobs.events_since(job_id, seen, timeout=15.0)
+            if batch is None:
+                return
+            if not batch:
+                # Comment line keeps proxies from closing an idle connection.
+                yield ": keepalive\n\n"
+                continue
+            seen += len(batch)
+            for name, payload in batch:
+                yield f"event: {name}\ndata: {json.dumps(payload)}\n\n"
+                if name in ("done", "failed"):
+                    return
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 def main():
     import webbrowser
-    import threading
     
     # Bake core sprites and exit (used to commit high-quality sprites into the repo).
     if "--bake-core" in sys.argv:
@@ -5011,9 +5568,8 @@ def main():
         q = str(q).lower().strip()
         if q not in ["low", "medium", "high"]:
             q = "high"
-        Config.IMAGE_QUALITY = q
         # Use a higher quality text model for bake-time prompts (not many calls here anyway).
-        Config.TEXT_MODEL = "gpt-4o"
+        run = RunConfig(image_quality=q, text_model="gpt-4o")
 
         api_key = os.environ.get("OPENAI_API_KEY") or os.environ.get("OPENAI_API_KEY".lower())
         if not api_key:
@@ -5021,7 +5577,7 @@ def main():
         if not api_key:
             raise SystemExit("Missing OPENAI_API_KEY.")
 
-        client = OpenAIClient(api_key)
+        client = OpenAIClient(api_key, run)
         os.makedirs(BAKED_SPRITES_DIR, exist_ok=True)
         manifest: dict[str, str] = {}
 
@@ -5051,14 +5607,28 @@ def main():
             ("inn_room_door", "item", "top-down pixel RPG wooden room door with number plaque and handle, transparent background"),
         ]
 
-        print(f"Baking core sprites to {BAKED_SPRITES_DIR} (quality={Config.IMAGE_QUALITY})...")
-        for key, role, desc in core:
-            img = client.generate_image(desc, role=role, theme="fantasy pixel adventure")
-            out_name = f"{key}.png"
-            out_path = os.path.join(BAKED_SPRITES_DIR, out_name)
-            img.save(out_path)
-            manifest[key] = out_name
-            print(f"  wrote {out_path}")
+        theme = "fantasy pixel adventure"
+        print(f"Baking core sprites to {BAKED_SPRITES_DIR} (quality={run.image_quality})...")
+        baked: dict[str, Image.Image] = {}
+        # Batch API by default (half price, no rush at bake time); --sync uses direct requests.
+        if "--sync" not in sys.argv:
+            try:
+                baked = client.generate_images_batch([(key, desc, role, theme) for key, role, desc in core])
+            except Exception as e:
+                print(f"  batch failed ({e}); generating directly")
+
+        def bake(key: str, role: str, desc: str) -> str:
+            img = baked[key] if key in baked else client.generate_image(desc, role=role, theme=theme)
+            _save_baked_sprite(img, os.path.join(BAKED_SPRITES_DIR, f"{key}.png"))
+            return f"{key}.png"
+
+        # Each sprite is quantized and written as soon as it arrives, overlapping the downloads
+        # still in flight (PIL releases the GIL while encoding).
+        with ThreadPoolExecutor(max_workers=Config.IMAGE_CONCURRENCY) as pool:
+            futures = {key: pool.submit(bake, key, role, desc) for key, role, desc in core}
+        for key, _role, _desc in core:
+            manifest[key] = futures[key].result()
+            print(f"  wrote {os.path.join(BAKED_SPRITES_DIR, manifest[key])}")
 
         with open(BAKED_MANIFEST_PATH, "w", encoding="utf-8") as f:
             json.dump(manifest, f, indent=2, sort_keys=True)
@@ -5100,24 +5670,22 @@ def main():
     print("\n⏳ Waiting for you to generate a world...")
     print("   (Press Ctrl+C to quit)\n")
     
+    # Block until a job finishes. Windows only delivers Ctrl+C between waits, so it wakes periodically.
+    ready_timeout = 0.5 if os.name == "nt" else None
     while True:
         try:
-            if pending_game["ready"]:
+            levels = jobs.next_ready(timeout=ready_timeout)
+            if levels is not None:
                 print("\n" + "="*50)
                 print("🌟 WORLD READY! Press ENTER to explore...")
                 print("="*50)
                 input()
                 
-                levels = pending_game["levels"]
-                pending_game["ready"] = False
-                
                 engine = GameEngine(levels, config)
                 engine.run()
                 
                 print("\n✨ Thanks for playing!")
                 print("⏳ Generate another world, or Ctrl+C to quit...\n")
-            
-            time.sleep(0.5)
         except KeyboardInterrupt:
             print("\nGoodbye!")
             break
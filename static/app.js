@@ -0,0 +1,244 @@
+(() => {
+    // Biomes and goal choices ship once as JSON; build the per-level cards from them.
+    const UI = JSON.parse(document.getElementById('uiOptions').textContent);
+    const capitalize = (s) => s.charAt(0).toUpperCase() + s.slice(1);
+
+    function buildLevelCards() {
+        const cardTpl = document.getElementById('levelCardTpl').content.firstElementChild;
+        const goalTpl = document.getElementById('goalOptTpl').content.firstElementChild;
+        const box = document.getElementById('goalLevels');
+        UI.levels.forEach(n => {
+            const card = cardTpl.cloneNode(true);
+            const slot = (name) => card.querySelector(`[data-slot="${name}"]`);
+            if (n > 1) card.id = 'goalL' + n;
+            slot('title').textContent = `Level ${n} goals`;
+            slot('biome-label').textContent = `Level ${n} biome`;
+            const select = slot('biome');
+            select.id = 'biomeL' + n;
+            UI.biomes.forEach(b => select.append(new Option(capitalize(b), b)));
+            const goals = slot('goals');
+            UI.goals.forEach(([value, idSlug, label]) => {
+                const opt = goalTpl.cloneNode(true);
+                const input = opt.querySelector('input');
+                input.id = `goal-l${n}-${idSlug}`;
+                input.className = 'goalOptL' + n;
+                input.value = value;
+                opt.htmlFor = input.id;
+                opt.append(' ' + label);
+                goals.append(opt);
+            });
+            box.append(card);
+        });
+    }
+    buildLevelCards();
+
+    // The script loads at the end of <body>, so the elements it touches already exist;
+    // look them up once.
+    const $prompt = document.getElementById('prompt');
+    const $levels = document.getElementById('levels');
+    const $btn = document.getElementById('btn');
+    const $status = document.getElementById('status');
+    const $biomeSelects = [1, 2, 3].map(n => document.getElementById('biomeL' + n));
+    const $goalOpts = [1, 2, 3].map(n => Array.from(document.querySelectorAll('.goalOptL' + n)));
+    const $goalCards = [document.getElementById('goalL2'), document.getElementById('goalL3')];
+    const $hintRow = document.getElementById('hintRow');
+    const $hints = document.getElementById('hintPreview');
+    // Structured hints live apart from the freeform prompt text and are only merged
+    // into it when the request is sent.
+    const TOKEN_KEYS = ['Biome', 'Time', 'Layout', 'Theme'];
+    const tokens = { Biome: '', Time: '', Layout: '', Theme: '' };
+    const TOKEN_RE = {};
+    TOKEN_KEYS.forEach(k => { TOKEN_RE[k] = new RegExp(`\\b${k}\\s*:\\s*[^.\\n]+`, 'i'); });
+
+    function refreshHints() {
+        const parts = TOKEN_KEYS.filter(k => tokens[k]).map(k => `${k}: ${tokens[k]}`);
+        $hints.textContent = 'Hints: ' + parts.join(' · ');
+        $hintRow.style.display = parts.length ? 'flex' : 'none';
+    }
+    function setBiomeHint(biome) { tokens.Biome = biome; refreshHints(); }
+    function setTimeHint(tod) { tokens.Time = tod; refreshHints(); }
+    function clearHints() { TOKEN_KEYS.forEach(k => { tokens[k] = ''; }); refreshHints(); }
+
+    // Merge the staged hints into the prompt; a hint replaces the same key typed by hand.
+    function withHints(prompt) {
+        let p = prompt.trim();
+        TOKEN_KEYS.forEach(k => {
+            if (!tokens[k]) return;
+            if (TOKEN_RE[k].test(p)) {
+                p = p.replace(TOKEN_RE[k], `${k}: ${tokens[k]}`);
+            } else {
+                p = p ? `${p} ${k}: ${tokens[k]}.` : `${k}: ${tokens[k]}.`;
+            }
+        });
+        return p;
+    }
+    function randomPrompt() {
+        // These arrays are intentionally aligned with the README's "fixed (finite sets)" so the
+        // randomizer can hit all supported biomes / times / layout styles and trigger themed decor.
+        const biomes = UI.biomes;
+        const times = ["day", "dawn", "sunset", "night"];
+        const layouts = [
+            "winding_road", "crossroads", "ring_road", "plaza", "market_street",
+            "coastline", "riverbend", "islands", "oasis", "lake_center",
+            "maze_grove", "ruin_ring"
+        ];
+        const decorTags = [
+            "cacti", "shells", "snow piles", "crates", "statues", "vines", "mushrooms", "lanterns", "harbor", "bazaar"
+        ];
+        const places = [
+            "a quiet town", "a lantern-lit harbor", "an ancient temple ruin", "a cliffside castle courtyard",
+            "a snowy mountain hamlet", "a windy beach coast", "a misty forest grove", "a sunlit meadow"
+        ];
+        const heroes = [
+            "a red‑scarf alchemist’s apprentice", "a green‑cloaked ranger",
+            "a sailor‑adventurer with a brass compass", "a traveling bard with a lute",
+            "a young mage with a star brooch"
+        ];
+        const npcs = [
+            "a gentle healer", "a shrine keeper", "a friendly innkeeper",
+            "a wise librarian", "a village guard captain"
+        ];
+        const hooks = [
+            "gather three rare ingredients to brew a remedy",
+            "recover a lost heirloom hidden nearby",
+            "unlock an ancient gate with a hidden key",
+            "repair a broken bridge with materials from the shop",
+            "return a lost item to someone worried"
+        ];
+        const pick = (arr) => arr[Math.floor(Math.random() * arr.length)];
+        const biome = pick(biomes);
+        const tod = pick(times);
+        const layout = pick(layouts);
+        const tag = pick(decorTags);
+        const place = pick(places);
+        $prompt.value = `Setting: ${place}. ` +
+            `The hero is ${pick(heroes)}. The NPC is ${pick(npcs)}. The quest is to ${pick(hooks)}.`;
+        // Explicit tokens (sent with the prompt) so the hint extractor/layout parser can lock onto them.
+        Object.assign(tokens, { Biome: biome, Time: tod, Layout: layout, Theme: tag });
+        refreshHints();
+        // Randomize per-level goal options too (covers all allowed goal types over time).
+        randomGoals();
+    }
+
+    function clearGoals() {
+        $goalOpts.forEach(opts => opts.forEach(e => { e.checked = false; }));
+    }
+
+    function randomGoals() {
+        clearGoals();
+        const all = UI.goals.map(([value]) => value);
+        const pickN = (n) => {
+            // Partial Fisher-Yates: only the first n slots need to be drawn.
+            const c = all.slice();
+            for (let i = 0; i < n; i++) {
+                const j = i + Math.floor(Math.random() * (c.length - i));
+                [c[i], c[j]] = [c[j], c[i]];
+            }
+            return new Set(c.slice(0, n));
+        };
+        // For each level, pick 1-2 candidate goals (stacking options per level).
+        $goalOpts.forEach(opts => {
+            const picked = pickN(1 + Math.floor(Math.random() * 2));
+            opts.forEach(e => { e.checked = picked.has(e.value); });
+        });
+    }
+
+    function syncLevelUI() {
+        const levels = parseInt($levels.value || '3', 10);
+        const show2 = levels >= 2;
+        const show3 = levels >= 3;
+        $goalCards[0].style.display = show2 ? 'block' : 'none';
+        $goalCards[1].style.display = show3 ? 'block' : 'none';
+    }
+
+    // One {biome, goals} entry per played level; the server takes the level count from its length.
+    function levelSpecs(count) {
+        return $biomeSelects.slice(0, count).map((sel, i) => ({
+            biome: sel.value || '',
+            goals: $goalOpts[i].filter(e => e.checked).map(e => e.value),
+        }));
+    }
+    async function generate() {
+        const key = document.getElementById('apiKey').value;
+        let prompt = withHints($prompt.value || '');
+        const tod = document.getElementById('timeSelect').value || '';
+        const levelCount = Math.max(1, Math.min(3, parseInt($levels.value || '3', 10) || 3));
+        const quality = document.getElementById('quality').value || 'medium';
+        const terrainStyle = document.getElementById('terrainStyle').value || 'smooth';
+        if (!key) return alert('Enter API key!');
+        if (!prompt) return alert('Describe your world!');
+        if (tod && !TOKEN_RE.Time.test(prompt)) {
+            prompt = `${prompt.trim()} Time: ${tod}.`;
+        }
+        $btn.disabled = true;
+        $status.style.display = 'block';
+        $status.innerHTML = '<span class="spinner"></span> Generating world (20-30 sec)...';
+        try {
+            const res = await fetch('/generate', {
+                method: 'POST', headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({
+                    apiKey: key,
+                    prompt: prompt,
+                    levels: levelSpecs(levelCount),
+                    timeOfDay: tod,
+                    quality: quality,
+                    terrainStyle: terrainStyle
+                })
+            });
+            const data = await res.json();
+            if (!data.success) throw new Error(data.error);
+            followJob(data.jobId);
+        } catch (e) {
+            $status.innerHTML = '❌ ' + e.message;
+            $btn.disabled = false;
+        }
+    }
+
+    // Show the run's progress events until it finishes or fails.
+    function followJob(jobId) {
+        const es = new EventSource(`/job/${jobId}/events`);
+        // Titles and errors come from the model/server, so they go in as text, not HTML.
+        const end = (text) => {
+            es.close();
+            $status.textContent = text;
+            $btn.disabled = false;
+        };
+        const progress = (text) => {
+            $status.innerHTML = '<span class="spinner"></span> ';
+            $status.append(text);
+        };
+        es.addEventListener('level', (e) => {
+            const d = JSON.parse(e.data);
+            progress(`Level ${d.level}/${d.count} designed: ${d.title || 'untitled'} — drawing sprites...`);
+        });
+        es.addEventListener('sprites', (e) => {
+            const d = JSON.parse(e.data);
+            progress(`Level ${d.level}/${d.count} sprites ready...`);
+        });
+        es.addEventListener('done', () => end('✅ Done! Go to terminal and press ENTER!'));
+        es.addEventListener('failed', (e) => end('❌ ' + JSON.parse(e.data).error));
+        // Connection-level error (server gone); EventSource would otherwise retry forever.
+        es.onerror = () => end('❌ Lost connection to the generator.');
+    }
+
+    // One delegated listener for every data-action button on the page.
+    const ACTIONS = {
+        'biome': (el) => setBiomeHint(el.dataset.value),
+        'time': (el) => setTimeHint(el.dataset.value),
+        'clear-hints': clearHints,
+        'random-prompt': randomPrompt,
+        'clear-goals': clearGoals,
+        'random-goals': randomGoals,
+        'generate': generate,
+    };
+    document.addEventListener('click', (e) => {
+        const el = e.target.closest('[data-action]');
+        const action = el && ACTIONS[el.dataset.action];
+        if (action) action(el);
+    });
+    $levels.addEventListener('change', syncLevelUI);
+
+    // Initialize visibility
+    syncLevelUI();
+    refreshHints();
+})();